@@ -1,19 +1,22 @@
 """GTFS Performant integration for Home Assistant."""
-import asyncio
 from datetime import timedelta, datetime
+import filecmp
 import logging
 import json
-import re
 import shutil
-import unicodedata
+import time
 from pathlib import Path
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from homeassistant.helpers.event import async_track_time_interval, async_track_point_in_time
-import homeassistant.helpers.config_validation as cv
-import voluptuous as vol
+from homeassistant.helpers.event import async_track_point_in_time
+import homeassistant.util.dt as dt_util
+
+try:
+    import orjson
+except ImportError:  # orjson ships with Home Assistant, stdlib json is the fallback
+    orjson = None
 
 from .database import GTFSDatabase
 from .gtfs_loader import GTFSLoader
@@ -22,87 +25,170 @@ from .realtime import GTFSRealtimeHandler
 _LOGGER = logging.getLogger(__name__)
 
 DOMAIN = "gtfs_performant"
-PLATFORMS = ["sensor"]
+PLATFORMS = ("sensor",)
 
 DEFAULT_UPDATE_INTERVAL = 120  # seconds (2 minutes) - for departure queries and realtime updates
 DEFAULT_FULL_UPDATE_DAY = 1  # 1st of every month
 DEFAULT_FULL_UPDATE_HOUR = 4  # 4 AM
+MAX_REALTIME_INTERVAL = 600  # seconds - realtime fetch backoff cap while the feed is unchanged
+STABLE_TICKS_BEFORE_BACKOFF = 3  # unchanged fetches before the realtime interval starts doubling
 CARD_JS = "gtfs-departures-card.js"
+DATA_CARD_REGISTERED = "_card_registered"
 
 SERVICE_RELOAD_GTFS = "reload_gtfs_data"
 SERVICE_REFRESH_REALTIME = "refresh_realtime"
 
 
-def _slugify(text: str) -> str:
-    """Convert text to a slug matching Home Assistant's entity_id format."""
-    # Normalize unicode and remove accents
-    text = unicodedata.normalize("NFD", text)
-    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
-    # Convert to lowercase
-    text = text.lower()
-    # Replace non-alphanumeric with underscores
-    text = re.sub(r"[^a-z0-9]+", "_", text)
-    # Remove leading/trailing underscores
-    text = text.strip("_")
-    return text
+def _json_loads(data: bytes) -> dict:
+    """Parse JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
-async def _register_card(hass: HomeAssistant) -> None:
-    """Register the custom GTFS departures card as a Lovelace resource.
+def _json_dumps(data: dict) -> bytes:
+    """Serialize to indented JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode()
 
-    This makes the card available in the card picker but does NOT auto-add
-    it to any dashboard. Users must manually add it if they want to use it.
+
+def _install_card(www_dir: Path, storage_path: Path) -> None:
+    """Copy the card JS to the www folder and register it as a Lovelace resource.
+
+    Does blocking file I/O, so it must run in the executor.
     """
+    # Source path (in custom_components)
+    src = Path(__file__).parent / "www" / CARD_JS
+    if not src.exists():
+        _LOGGER.warning("Card JS not found at %s", src)
+        return
+
+    # Destination path (HA www folder)
+    www_dir.mkdir(parents=True, exist_ok=True)
+    dst = www_dir / CARD_JS
+
+    # Copy the card file (skip if the installed copy is already current)
     try:
-        # Source path (in custom_components)
-        src = Path(__file__).parent / "www" / CARD_JS
-        if not src.exists():
-            _LOGGER.warning("Card JS not found at %s", src)
-            return
-
-        # Destination path (HA www folder)
-        www_dir = Path(hass.config.path("www"))
-        www_dir.mkdir(parents=True, exist_ok=True)
-        dst = www_dir / CARD_JS
-
-        # Copy the card file
+        card_current = filecmp.cmp(src, dst, shallow=False)
+    except FileNotFoundError:
+        card_current = False
+
+    if card_current:
+        _LOGGER.debug("GTFS card at %s is up to date", dst)
+    else:
         shutil.copy2(src, dst)
         _LOGGER.info("Copied GTFS card to %s", dst)
 
-        # Register as Lovelace resource (makes it available in card picker)
-        # Add version for cache busting
-        url = f"/local/{CARD_JS}?v=1.2.0"
+    # Register as Lovelace resource (makes it available in card picker)
+    # Add version for cache busting
+    url = f"/local/{CARD_JS}?v=1.2.0"
 
-        # Check if already registered via storage
-        storage_path = Path(hass.config.path(".storage/lovelace_resources"))
+    # Check if already registered via storage
+    try:
+        resources_data = _json_loads(storage_path.read_bytes())
+    except FileNotFoundError:
         resources_data = {"version": 1, "minor_version": 1, "key": "lovelace_resources", "data": {"items": []}}
 
-        if storage_path.exists():
-            with open(storage_path, "r") as f:
-                resources_data = json.load(f)
+    items = resources_data.get("data", {}).get("items", [])
+    base_url = f"/local/{CARD_JS}"
+    card_item = {
+        "id": "gtfs_departures_card",
+        "type": "module",
+        "url": url
+    }
 
-        items = resources_data.get("data", {}).get("items", [])
-        base_url = f"/local/{CARD_JS}"
+    # Nothing to write if exactly the current version is registered
+    card_items = [i for i in items if i.get("url", "").startswith(base_url)]
+    if card_items == [card_item]:
+        _LOGGER.debug("GTFS card already registered in Lovelace resources: %s", url)
+        return
 
-        # Remove ALL existing gtfs card entries (handles duplicates)
-        items = [i for i in items if not i.get("url", "").startswith(base_url)]
+    # Remove ALL existing gtfs card entries (handles duplicates)
+    items = [i for i in items if not i.get("url", "").startswith(base_url)]
 
-        # Add the current version
-        items.append({
-            "id": "gtfs_departures_card",
-            "type": "module",
-            "url": url
-        })
+    # Add the current version
+    items.append(card_item)
 
-        resources_data["data"]["items"] = items
-        with open(storage_path, "w") as f:
-            json.dump(resources_data, f, indent=2)
-        _LOGGER.info("Registered GTFS card in Lovelace resources: %s", url)
+    resources_data["data"]["items"] = items
+    storage_path.write_bytes(_json_dumps(resources_data))
+    _LOGGER.info("Registered GTFS card in Lovelace resources: %s", url)
 
+
+async def _register_card(hass: HomeAssistant) -> None:
+    """Register the custom GTFS departures card as a Lovelace resource.
+
+    This makes the card available in the card picker but does NOT auto-add
+    it to any dashboard. Users must manually add it if they want to use it.
+    """
+    # Already done for an earlier entry (or before a reload) in this HA run
+    if hass.data.get(DOMAIN, {}).get(DATA_CARD_REGISTERED):
+        return
+
+    try:
+        await hass.async_add_executor_job(
+            _install_card,
+            Path(hass.config.path("www")),
+            Path(hass.config.path(".storage/lovelace_resources")),
+        )
+        hass.data.setdefault(DOMAIN, {})[DATA_CARD_REGISTERED] = True
     except Exception as err:
         _LOGGER.warning("Could not register card: %s", err)
 
 
+def _loaded_entries(hass: HomeAssistant) -> dict[str, dict]:
+    """Return the runtime data of all loaded entries, keyed by entry_id."""
+    return {
+        entry_id: data
+        for entry_id, data in hass.data.get(DOMAIN, {}).items()
+        if isinstance(data, dict)
+    }
+
+
+def _register_services(hass: HomeAssistant) -> None:
+    """Register the domain services, dispatching calls to the targeted entries.
+
+    Calls without an entry_id apply to every loaded entry.
+    """
+    if hass.services.has_service(DOMAIN, SERVICE_RELOAD_GTFS):
+        return
+
+    def _targets(call: ServiceCall) -> list[dict]:
+        entries = _loaded_entries(hass)
+        entry_id = call.data.get("entry_id")
+        if entry_id:
+            return [entries[entry_id]] if entry_id in entries else []
+        return list(entries.values())
+
+    async def handle_reload_gtfs(call: ServiceCall) -> None:
+        """Handle reload GTFS data service call."""
+        force_refresh = call.data.get("force_refresh", False)
+        for data in _targets(call):
+            coordinator = data["coordinator"]
+            _LOGGER.info("Reloading GTFS data for %s (force=%s)", data["entry"].title, force_refresh)
+            try:
+                await data["loader"].async_load_gtfs_data(force_reload=force_refresh)
+                await coordinator.async_refresh()
+                _LOGGER.info("GTFS data reloaded successfully")
+            except Exception as err:
+                _LOGGER.error("Failed to reload GTFS data: %s", err)
+
+    async def handle_refresh_realtime(call: ServiceCall) -> None:
+        """Handle refresh realtime service call."""
+        for data in _targets(call):
+            coordinator = data["coordinator"]
+            _LOGGER.info("Force refreshing realtime data for %s", data["entry"].title)
+            try:
+                await data["realtime_handler"].async_update_realtime_data()
+                await coordinator.async_refresh()
+                _LOGGER.info("Realtime data refreshed successfully")
+            except Exception as err:
+                _LOGGER.error("Failed to refresh realtime data: %s", err)
+
+    hass.services.async_register(DOMAIN, SERVICE_RELOAD_GTFS, handle_reload_gtfs)
+    hass.services.async_register(DOMAIN, SERVICE_REFRESH_REALTIME, handle_refresh_realtime)
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up GTFS Performant from a config entry."""
     hass.data.setdefault(DOMAIN, {})
@@ -156,30 +242,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Register custom card
     await _register_card(hass)
 
-    # Register services
-    async def handle_reload_gtfs(call):
-        """Handle reload GTFS data service call."""
-        force_refresh = call.data.get("force_refresh", False)
-        _LOGGER.info("Reloading GTFS data (force=%s)", force_refresh)
-        try:
-            await loader.async_load_gtfs_data(force_reload=force_refresh)
-            await coordinator.async_refresh()
-            _LOGGER.info("GTFS data reloaded successfully")
-        except Exception as err:
-            _LOGGER.error("Failed to reload GTFS data: %s", err)
-
-    async def handle_refresh_realtime(call):
-        """Handle refresh realtime service call."""
-        _LOGGER.info("Force refreshing realtime data")
-        try:
-            await realtime_handler.async_update_realtime_data()
-            await coordinator.async_refresh()
-            _LOGGER.info("Realtime data refreshed successfully")
-        except Exception as err:
-            _LOGGER.error("Failed to refresh realtime data: %s", err)
-
-    hass.services.async_register(DOMAIN, SERVICE_RELOAD_GTFS, handle_reload_gtfs)
-    hass.services.async_register(DOMAIN, SERVICE_REFRESH_REALTIME, handle_refresh_realtime)
+    # Register services (shared by all entries, only done once)
+    _register_services(hass)
 
     return True
 
@@ -189,10 +253,6 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
-        # Unregister services
-        hass.services.async_remove(DOMAIN, SERVICE_RELOAD_GTFS)
-        hass.services.async_remove(DOMAIN, SERVICE_REFRESH_REALTIME)
-
         data = hass.data[DOMAIN].pop(entry.entry_id)
 
         # Clean up scheduled tasks
@@ -201,6 +261,11 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
         await data["database"].async_close()
 
+        # Unregister services once the last entry is gone
+        if not _loaded_entries(hass):
+            hass.services.async_remove(DOMAIN, SERVICE_RELOAD_GTFS)
+            hass.services.async_remove(DOMAIN, SERVICE_REFRESH_REALTIME)
+
     return unload_ok
 
 
@@ -225,11 +290,18 @@ class GTFSDataUpdateCoordinator(DataUpdateCoordinator):
             name=DOMAIN,
             update_interval=timedelta(seconds=update_interval_seconds),
         )
+        # Departures are queried on every tick, only realtime fetches back off
+        self._base_realtime_interval = float(update_interval_seconds)
+        self._max_realtime_interval = float(max(update_interval_seconds, MAX_REALTIME_INTERVAL))
+        self._realtime_interval = self._base_realtime_interval
+        self._next_realtime_fetch = 0.0  # time.monotonic() deadline
+        # Consecutive fetches where the realtime feed was unchanged
+        self._stable_ticks = 0
         self.entry = entry
         self.database = database
         self.realtime_handler = realtime_handler
         self.loader = loader
-        self.selected_stops = entry.data.get("selected_stops", [])
+        self.selected_stops = tuple(entry.data.get("selected_stops", ()))
 
         # Set up monthly full reload task
         self._monthly_update_task = None
@@ -237,8 +309,6 @@ class GTFSDataUpdateCoordinator(DataUpdateCoordinator):
 
     def _setup_monthly_update(self):
         """Set up monthly full GTFS data reload."""
-        from datetime import timedelta
-
         full_update_day = self.entry.data.get("full_update_day", DEFAULT_FULL_UPDATE_DAY)
         full_update_hour = self.entry.data.get("full_update_hour", DEFAULT_FULL_UPDATE_HOUR)
 
@@ -271,7 +341,6 @@ class GTFSDataUpdateCoordinator(DataUpdateCoordinator):
         full_update_day = self.entry.data.get("full_update_day", DEFAULT_FULL_UPDATE_DAY)
         full_update_hour = self.entry.data.get("full_update_hour", DEFAULT_FULL_UPDATE_HOUR)
 
-        import homeassistant.util.dt as dt_util
         now = dt_util.now()
         # Create target date for this month
         target = now.replace(day=full_update_day, hour=full_update_hour, minute=0, second=0, microsecond=0)
@@ -286,35 +355,55 @@ class GTFSDataUpdateCoordinator(DataUpdateCoordinator):
 
         return target
 
-    async def _async_update_realtime(self):
-        """Update realtime data separately from departure queries."""
-        try:
-            await self.realtime_handler.async_update_realtime_data()
-            _LOGGER.debug("Realtime data updated")
-        except Exception as e:
-            _LOGGER.debug("Realtime update failed: %s", e)
-
     async def async_shutdown(self):
         """Clean up scheduled tasks."""
         if self._monthly_update_task:
             self._monthly_update_task()
             self._monthly_update_task = None
 
+    def _adapt_realtime_interval(self, realtime_updates: int | None) -> None:
+        """Back off realtime fetches while the feed is unchanged.
+
+        realtime_updates is None only for a 304 or an unchanged feed
+        timestamp. Failed or skipped updates (0) fetch at the base interval
+        again. The coordinator interval is never changed, so departures and
+        minutes until departure keep updating on every tick.
+        """
+        if realtime_updates is not None:
+            self._stable_ticks = 0
+            if self._realtime_interval != self._base_realtime_interval:
+                _LOGGER.debug("Realtime feed changed or failed, fetching every %ds again",
+                              self._base_realtime_interval)
+                self._realtime_interval = self._base_realtime_interval
+        else:
+            self._stable_ticks += 1
+            if self._stable_ticks > STABLE_TICKS_BEFORE_BACKOFF:
+                interval = min(self._realtime_interval * 2, self._max_realtime_interval)
+                if interval != self._realtime_interval:
+                    _LOGGER.debug("Realtime feed unchanged for %d fetches, backing off to %ds",
+                                  self._stable_ticks, interval)
+                    self._realtime_interval = interval
+
+        self._next_realtime_fetch = time.monotonic() + self._realtime_interval
+
     async def _async_update_data(self) -> dict:
         """Fetch latest scheduled + realtime data."""
         try:
-            # Try to update realtime feed (non-blocking if fails)
-            try:
-                await self.realtime_handler.async_update_realtime_data()
-            except Exception as rt_err:
-                _LOGGER.debug("Realtime update skipped: %s", rt_err)
-
-            # Fetch scheduled departures for all selected stops
-            departures = {}
-            for stop_id in self.selected_stops:
-                # Get scheduled departures (this always works)
-                stop_departures = await self.database.get_scheduled_departures(stop_id, limit=15)
-                departures[stop_id] = stop_departures
+            # Try to update realtime feed (non-blocking if fails). Half a tick
+            # of slack, so timer jitter doesn't push a due fetch a tick later.
+            if time.monotonic() + self._base_realtime_interval / 2 >= self._next_realtime_fetch:
+                realtime_updates = 0
+                try:
+                    realtime_updates = await self.realtime_handler.async_update_realtime_data()
+                except Exception as rt_err:
+                    _LOGGER.debug("Realtime update skipped: %s", rt_err)
+
+                self._adapt_realtime_interval(realtime_updates)
+
+            # Fetch scheduled departures for all stops in one query
+            departures = await self.database.get_scheduled_departures_bulk(
+                self.selected_stops, per_stop_limit=15
+            )
 
             return {
                 "status": "success",
@@ -1,16 +1,38 @@
 """Multi-step config flow for GTFS Performant with intelligent stop/route discovery."""
+import asyncio
+import csv
+import hashlib
+import json
 import logging
+import sys
+import tempfile
+import zipfile
+from collections import defaultdict, namedtuple
+from io import TextIOWrapper
+from itertools import islice
+from pathlib import Path
+from typing import IO, Iterator
+
 import aiohttp
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.selector import (
     SelectSelector,
     SelectSelectorConfig,
     SelectSelectorMode,
 )
+from homeassistant.helpers.storage import Store
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:  # pyarrow is optional, the stdlib scan is the fallback
+    pa = pa_csv = None
 
 from . import DOMAIN
 
@@ -23,9 +45,356 @@ STEP_USER_DATA_SCHEMA = vol.Schema({
 })
 
 
+URL_CHECK_TIMEOUT = aiohttp.ClientTimeout(total=3)
+# Feeds with more stops than this are searched first, the stop dropdown only
+# ever receives the matches instead of every stop of the feed
+STOP_SEARCH_THRESHOLD = 2000
+STOP_SEARCH_LIMIT = 200
+# Large feeds can take minutes to download, only give up when the transfer stalls
+GTFS_DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+# Downloaded archives and their ETag/Last-Modified, keyed by sha1 of the URL
+GTFS_CACHE_DIR = ".storage/gtfs_performant_cache"
+# Downloads are streamed to disk in chunks of this size
+GTFS_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Parsed stop discovery results, reused while the archive validators match
+DISCOVERY_STORAGE_VERSION = 1
+# Bytes of a GTFS file pyarrow parses into one record batch. Large, so the
+# trips table is joined against few batches, but bounded unlike read_csv.
+ARROW_BLOCK_SIZE = 64 * 1024 * 1024
+
+# One GTFS parse at a time per static URL, so concurrent flows do not
+# multiply the memory spent on decompressing the same archive
+_PARSE_LOCKS: dict[str, asyncio.Semaphore] = {}
+
+
+# Discovery records, tuples take a fraction of the memory of per-row dicts
+Route = namedtuple("Route", "route_id route_short_name route_long_name route_type")
+
+
+class CannotConnect(HomeAssistantError):
+    """Error to indicate a GTFS URL is unreachable."""
+
+    def __init__(self, error_key: str) -> None:
+        """Store the config flow error key for the failing URL."""
+        super().__init__(error_key)
+        self.error_key = error_key
+
+
+def _validators(headers) -> dict:
+    """Extract the HTTP cache validators from response headers."""
+    return {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+    }
+
+
+def _validators_match(cached: dict, current: dict) -> bool:
+    """Return True if two sets of validators identify the same archive."""
+    if current.get("etag"):
+        return cached.get("etag") == current["etag"]
+    if current.get("last_modified"):
+        return cached.get("last_modified") == current["last_modified"]
+    return False
+
+
+def _content_length(response: aiohttp.ClientResponse) -> int | None:
+    """Return the full size of a resource from a HEAD or ranged GET response."""
+    # A 206 reply only carries the length of the range, the total is in Content-Range
+    total = response.headers.get("Content-Range", "").rpartition("/")[2]
+    if total.isdigit():
+        return int(total)
+    return response.content_length
+
+
+def _probe_result(response: aiohttp.ClientResponse, url: str) -> dict | None:
+    """Turn a probe response into cache validators, or None if it failed."""
+    if response.status >= 400:
+        return None
+    size = _content_length(response)
+    if size is not None:
+        _LOGGER.debug("%s is %.1f MB", url, size / 1024 / 1024)
+    return _validators(response.headers)
+
+
+async def _head(session: aiohttp.ClientSession, url: str) -> dict | None:
+    """Check a URL with a HEAD request, returning its cache validators.
+
+    Servers that do not implement HEAD are asked for the first byte only.
+    Returns None if the URL is unreachable.
+    """
+    try:
+        async with session.head(
+            url, timeout=URL_CHECK_TIMEOUT, allow_redirects=True
+        ) as response:
+            if response.status != 405:
+                return _probe_result(response, url)
+
+        async with session.get(
+            url,
+            headers={"Range": "bytes=0-0"},
+            timeout=URL_CHECK_TIMEOUT,
+            allow_redirects=True,
+        ) as response:
+            return _probe_result(response, url)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+        _LOGGER.debug("Probing %s failed: %s", url, err)
+        return None
+
+
 async def validate_input(hass: HomeAssistant, data: dict) -> dict:
     """Validate the user input allows us to connect."""
-    return {"title": data.get("name", "GTFS Transit")}
+    session = async_get_clientsession(hass)
+    static_validators, realtime_validators = await asyncio.gather(
+        _head(session, data["static_url"]),
+        _head(session, data["realtime_url"]),
+    )
+    if static_validators is None:
+        raise CannotConnect("cannot_connect_static")
+    if realtime_validators is None:
+        raise CannotConnect("cannot_connect_realtime")
+    return {
+        "title": data.get("name", "GTFS Transit"),
+        "static_validators": static_validators,
+    }
+
+
+def _cache_paths(cache_dir: Path, url: str) -> tuple[Path, Path]:
+    """Return the archive and validators paths for a cached URL."""
+    key = hashlib.sha1(url.encode()).hexdigest()
+    return cache_dir / f"{key}.zip", cache_dir / f"{key}.json"
+
+
+def _load_cached_validators(cache_dir: Path, url: str) -> dict:
+    """Return the validators of the cached archive, or {} if there is none."""
+    archive_path, validators_path = _cache_paths(cache_dir, url)
+    try:
+        if archive_path.is_file():
+            return json.loads(validators_path.read_text())
+    except (OSError, ValueError) as err:
+        _LOGGER.debug("Ignoring unreadable GTFS cache for %s: %s", url, err)
+    return {}
+
+
+def _open_download(cache_dir: Path) -> IO[bytes]:
+    """Create the temporary file a download is streamed into."""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return tempfile.NamedTemporaryFile(dir=cache_dir, suffix=".part", delete=False)
+
+
+def _discard_download(part: IO[bytes]) -> None:
+    """Close and remove an unfinished download."""
+    part.close()
+    Path(part.name).unlink(missing_ok=True)
+
+
+def _finish_download(
+    cache_dir: Path, url: str, part: IO[bytes], validators: dict
+) -> tuple[Path, int]:
+    """Move a finished download into the cache, returning its path and size.
+
+    An archive served without ETag or Last-Modified could never be reused,
+    so it is not cached. It stays at its temporary path, which the flow
+    removes when it ends.
+    """
+    part.close()
+    archive_path, validators_path = _cache_paths(cache_dir, url)
+    # Drop the old validators first, they must never describe the new archive
+    validators_path.unlink(missing_ok=True)
+    if not any(validators.values()):
+        # The cached archive is outdated and can't be validated any more
+        archive_path.unlink(missing_ok=True)
+        archive_path = Path(part.name)
+        return archive_path, archive_path.stat().st_size
+    Path(part.name).replace(archive_path)
+    validators_path.write_text(json.dumps(validators))
+    return archive_path, archive_path.stat().st_size
+
+
+def _discovery_store(hass: HomeAssistant, url: str) -> Store:
+    """Return the store holding parsed discovery results for a static URL."""
+    key = hashlib.sha1(url.encode()).hexdigest()
+    return Store(hass, DISCOVERY_STORAGE_VERSION, f"{DOMAIN}_discovery_{key}")
+
+
+def _column(header: list[str], name: str) -> int:
+    """Return the index of an optional CSV column, or -1 if it is missing."""
+    return header.index(name) if name in header else -1
+
+
+def _parse_stops_sync(zf: zipfile.ZipFile) -> tuple[list[str], dict[str, str]]:
+    """Parse agency names and stops from a GTFS archive, run in the executor."""
+    # Get agency info
+    agencies = []
+    try:
+        with zf.open('agency.txt') as f:
+            reader = csv.reader(TextIOWrapper(f, encoding='utf-8-sig', newline=''))
+            idx_name = next(reader).index('agency_name')
+            # Only the first agency is shown, leave the rest of the file unread
+            row = next(reader, [])
+            if len(row) > idx_name:
+                agencies = [row[idx_name]]
+            _LOGGER.info("Found agency: %s", agencies)
+    except Exception as e:
+        _LOGGER.warning("Could not read agency.txt: %s", e)
+    
+    # Get stops (only location_type = 0 for actual stops)
+    stops = []
+    try:
+        with zf.open('stops.txt') as f:
+            reader = csv.reader(TextIOWrapper(f, encoding='utf-8-sig', newline=''))
+            # Resolve column positions once, rows are then indexed directly
+            header = next(reader)
+            idx_id = header.index('stop_id')
+            idx_name = _column(header, 'stop_name')
+            idx_lt = _column(header, 'location_type')
+            width = max(idx_id, idx_name, idx_lt) + 1
+            # Without a location_type column every row is a stop
+            has_lt = idx_lt >= 0
+            for row in reader:
+                if len(row) < width:
+                    continue
+                if has_lt:
+                    location_type = row[idx_lt]
+                    if location_type and location_type != '0':
+                        continue
+                stop_id = row[idx_id]
+                if stop_id:  # Only add if we have a stop_id
+                    # Platforms of one station repeat the same name, share the string
+                    stops.append((sys.intern(row[idx_name]) if idx_name >= 0 else 'Unknown', stop_id))
+        
+        # Sort by name
+        stops.sort()
+        _LOGGER.info("Discovered %d stops", len(stops))
+        
+    except Exception as e:
+        _LOGGER.error("Error parsing stops: %s", e, exc_info=True)
+        return agencies, {}
+
+    return agencies, {stop_id: stop_name for stop_name, stop_id in stops}
+
+
+def _iter_column_pairs(
+    zf: zipfile.ZipFile, name: str, col_a: str, col_b: str
+) -> Iterator[tuple[bytes, bytes]]:
+    """Yield the raw (col_a, col_b) values of every row of a GTFS file.
+
+    Only two columns are needed, so unquoted lines are split on raw bytes
+    instead of going through the csv module. Quoted lines, and whole files
+    with a quoted header, still take the csv path.
+    """
+    with zf.open(name) as f:
+        header_line = f.readline().decode('utf-8-sig')
+        header = next(csv.reader([header_line]))
+        idx_a = header.index(col_a)
+        idx_b = header.index(col_b)
+        width = max(idx_a, idx_b) + 1
+
+        if '"' in header_line:
+            for row in csv.reader(TextIOWrapper(f, encoding='utf-8', newline='')):
+                if len(row) >= width:
+                    yield row[idx_a].encode(), row[idx_b].encode()
+            return
+
+        for line in f:
+            if b'"' in line:
+                row = next(csv.reader([line.decode('utf-8')]), [])
+                if len(row) >= width:
+                    yield row[idx_a].encode(), row[idx_b].encode()
+                continue
+            row = line.rstrip(b'\r\n').split(b',', width)
+            if len(row) >= width:
+                yield row[idx_a], row[idx_b]
+
+
+def _open_arrow_columns(f: IO[bytes], columns: list[str]) -> "pa_csv.CSVStreamingReader":
+    """Stream only the given columns of a GTFS file as Arrow record batches."""
+    return pa_csv.open_csv(
+        f,
+        read_options=pa_csv.ReadOptions(block_size=ARROW_BLOCK_SIZE),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=columns,
+            column_types={column: pa.string() for column in columns},
+        ),
+    )
+
+
+def _build_route_index_arrow(zf: zipfile.ZipFile) -> dict[str, frozenset[str]]:
+    """Build the stop to routes index with pyarrow's multithreaded CSV reader."""
+    with zf.open('trips.txt') as f:
+        trips = _open_arrow_columns(f, ['trip_id', 'route_id']).read_all()
+
+    stop_to_routes: defaultdict[str, set[str]] = defaultdict(set)
+    with zf.open('stop_times.txt') as f:
+        for batch in _open_arrow_columns(f, ['stop_id', 'trip_id']):
+            # Join and deduplicate one record batch at a time in Arrow, only
+            # its distinct (stop, route) pairs ever become Python objects
+            pairs = (
+                pa.Table.from_batches([batch])
+                .join(trips, 'trip_id', join_type='inner')
+                .group_by(['stop_id', 'route_id'])
+                .aggregate([])
+            )
+            for stop_id, route_id in zip(
+                pairs.column('stop_id').to_pylist(), pairs.column('route_id').to_pylist()
+            ):
+                stop_to_routes[sys.intern(stop_id)].add(sys.intern(route_id))
+    return {stop_id: frozenset(routes) for stop_id, routes in stop_to_routes.items()}
+
+
+def _build_route_index_sync(zf: zipfile.ZipFile) -> dict[str, frozenset[str]]:
+    """Map every stop_id to the route_ids calling there, run in the executor."""
+    if pa_csv is not None:
+        try:
+            route_index = _build_route_index_arrow(zf)
+        except pa.ArrowInvalid as err:
+            # pyarrow rejects rows with more or fewer fields than the header,
+            # the byte scan below tolerates them
+            _LOGGER.debug("Indexing routes without pyarrow: %s", err)
+        else:
+            _LOGGER.info("Indexed routes for %d stops", len(route_index))
+            return route_index
+
+    # trips.txt repeats a few route_ids over and over, share one object per id
+    route_ids: dict[bytes, bytes] = {}
+    trip_to_route = {
+        trip_id: route_ids.setdefault(route_id, route_id)
+        for trip_id, route_id in _iter_column_pairs(zf, 'trips.txt', 'trip_id', 'route_id')
+    }
+
+    stop_to_routes: defaultdict[bytes, set[bytes]] = defaultdict(set)
+    for stop_id, trip_id in _iter_column_pairs(zf, 'stop_times.txt', 'stop_id', 'trip_id'):
+        route_id = trip_to_route.get(trip_id)
+        if route_id is not None:
+            stop_to_routes[stop_id].add(route_id)
+
+    _LOGGER.info("Indexed routes for %d stops", len(stop_to_routes))
+    route_names = {route_id: sys.intern(route_id.decode()) for route_id in route_ids}
+    return {
+        sys.intern(stop_id.decode()): frozenset(route_names[route_id] for route_id in routes)
+        for stop_id, routes in stop_to_routes.items()
+    }
+
+
+def _read_routes(zf: zipfile.ZipFile) -> dict[str, Route]:
+    """Read every route from routes.txt, keyed by route_id."""
+    with zf.open('routes.txt') as f:
+        reader = csv.reader(TextIOWrapper(f, encoding='utf-8-sig', newline=''))
+        header = next(reader)
+        idx_route = header.index('route_id')
+        idx_short = _column(header, 'route_short_name')
+        idx_long = _column(header, 'route_long_name')
+        idx_type = _column(header, 'route_type')
+        width = max(idx_route, idx_short, idx_long, idx_type) + 1
+        return {
+            row[idx_route]: Route(
+                row[idx_route],
+                row[idx_short] if idx_short >= 0 else '',
+                row[idx_long] if idx_long >= 0 else '',
+                row[idx_type] if idx_type >= 0 else '0',
+            )
+            for row in reader
+            if len(row) >= width
+        }
 
 
 class GTFSPerformantConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -36,39 +405,69 @@ class GTFSPerformantConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     def __init__(self):
         """Initialize the config flow."""
         self.gtfs_data = {}
-        self.available_stops = []
+        # stop_id -> stop_name for every discovered stop, in name order
+        self.available_stops: dict[str, str] = {}
         self.available_routes = []
         self.selected_stops = []
         self.selected_routes = []
         self.stop_groups = []
+        # stop_id -> stop_name for the selection
+        self._selected_id_to_name: dict[str, str] = {}
+        # Selector options, built once after discovery instead of on every render
+        self._stop_options: list[dict] = []
+        self._route_options: list[dict] = []
+        # Matches of the last stop search, shown instead of every stop on large feeds
+        self._stop_search_options: list[dict] | None = None
+        # URL pair that already passed validate_input, so resubmitting skips the check
+        self._validated_urls = None
+        # ETag/Last-Modified of the static feed from the validation HEAD request
+        self._static_validators: dict = {}
+        # Static GTFS archive in the disk cache, downloaded once and shared by
+        # both discovery passes
+        self._gtfs_path: Path | None = None
+        self._gtfs_path_url = None
+        self._gtfs_size = 0
+        # Download kept outside the cache for lack of validators, removed with the flow
+        self._gtfs_temp_path: Path | None = None
+        # The archive is opened once, both discovery passes read members from it
+        self._gtfs_zip = None
+        # ETag/Last-Modified of the archive at _gtfs_path
+        self._gtfs_validators: dict = {}
+        # stop_id -> route_ids and routes by route_id, built in the background
+        # while stops are picked
+        self._route_index_task: asyncio.Task | None = None
+        self._gtfs_lock = asyncio.Lock()
     
     async def async_step_user(
         self, user_input: dict[str, str] | None = None
     ) -> FlowResult:
         """Step 1: Basic GTFS source configuration."""
-        _LOGGER.info("🔍 async_step_user called with user_input: %s", user_input)
+        _LOGGER.debug("async_step_user called with user_input: %s", user_input)
         errors = {}
         if user_input is not None:
+            urls = (user_input["static_url"], user_input["realtime_url"])
             try:
-                # Validate URLs work
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(user_input["static_url"]) as response:
-                        if response.status != 200:
-                            errors["base"] = "cannot_connect"
-                        else:
-                            # Store URLs and proceed to discovery
-                            self.gtfs_data = {
-                                "static_url": user_input["static_url"],
-                                "realtime_url": user_input["realtime_url"],
-                                "name": user_input.get("name", "GTFS Transit")
-                            }
-                            _LOGGER.info("✅ URLs validated, proceeding to discover_stops")
-                            return await self.async_step_discover_stops()
+                if urls != self._validated_urls:
+                    info = await validate_input(self.hass, user_input)
+                    self._static_validators = info["static_validators"]
+                    self._validated_urls = urls
+            except CannotConnect as err:
+                _LOGGER.error("Cannot reach GTFS source: %s", err.error_key)
+                errors["base"] = err.error_key
             except Exception as err:
                 _LOGGER.error("Error connecting to GTFS source: %s", err)
                 errors["base"] = "cannot_connect"
+            else:
+                # Store URLs and proceed to discovery
+                self.gtfs_data = {
+                    "static_url": user_input["static_url"],
+                    "realtime_url": user_input["realtime_url"],
+                    "name": user_input.get("name", "GTFS Transit")
+                }
+                _LOGGER.info("URLs validated, proceeding to discover_stops")
+                return await self.async_step_discover_stops()
         
-        _LOGGER.info("📝 Showing user form")
+        _LOGGER.debug("Showing user form")
         return self.async_show_form(
             step_id="user",
             data_schema=STEP_USER_DATA_SCHEMA,
@@ -79,19 +478,59 @@ class GTFSPerformantConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self, user_input: dict[str, str] | None = None
     ) -> FlowResult:
         """Step 2: Download GTFS and discover available stops, then go directly to selection."""
-        _LOGGER.info("🔍 async_step_discover_stops called")
+        _LOGGER.debug("async_step_discover_stops called")
 
         # Download and parse GTFS to get stops
-        _LOGGER.info("📥 Discovering GTFS stops...")
+        _LOGGER.info("Discovering GTFS stops...")
         info = await self._discover_gtfs_stops()
 
         if not info or not self.available_stops:
-            _LOGGER.error("❌ Failed to discover stops")
+            _LOGGER.error("Failed to discover stops")
             return self.async_abort(reason="cannot_load_stops")
 
-        _LOGGER.info("✅ Discovered %d stops, proceeding to select_stops", len(self.available_stops))
+        if len(self.available_stops) > STOP_SEARCH_THRESHOLD:
+            _LOGGER.info("Discovered %d stops, proceeding to search_stops", len(self.available_stops))
+            return await self.async_step_search_stops()
+
+        _LOGGER.info("Discovered %d stops, proceeding to select_stops", len(self.available_stops))
         # Go directly to stop selection (skip the empty confirmation step)
         return await self.async_step_select_stops()
+
+    async def async_step_search_stops(
+        self, user_input: dict[str, str] | None = None
+    ) -> FlowResult:
+        """Step 2b: Narrow down the stops of large feeds by name or stop ID."""
+        errors = {}
+        if user_input is not None:
+            # Comma separated terms, a stop matches if its label contains any of them
+            terms = [
+                term.strip().casefold()
+                for term in user_input["query"].split(",")
+                if term.strip()
+            ]
+            matches = list(islice(
+                (
+                    option for option in self._stop_options
+                    if any(term in option["label"].casefold() for term in terms)
+                ),
+                STOP_SEARCH_LIMIT,
+            ))
+            if matches:
+                self._stop_search_options = matches
+                return await self.async_step_select_stops()
+            errors["base"] = "no_stops_found"
+
+        return self.async_show_form(
+            step_id="search_stops",
+            data_schema=vol.Schema({
+                vol.Required("query"): str,
+            }),
+            errors=errors,
+            description_placeholders={
+                "stops_count": len(self.available_stops),
+                "limit": STOP_SEARCH_LIMIT,
+            }
+        )
     
     async def async_step_group_stops(
         self, user_input: dict[str, str] | None = None
@@ -132,6 +571,11 @@ class GTFSPerformantConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             selected_stops_input = user_input.get("selected_stops", [])
             if isinstance(selected_stops_input, list):
                 self.selected_stops = selected_stops_input
+            self._selected_id_to_name = {
+                stop_id: self.available_stops[stop_id]
+                for stop_id in self.selected_stops
+                if stop_id in self.available_stops
+            }
 
             # Auto-generate groups based on same name (user can modify next)
             self._auto_group_stops_by_name()
@@ -139,17 +583,16 @@ class GTFSPerformantConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             # Show groups for user to review/modify
             return await self.async_step_review_groups()
         
-        # Create selector options for ALL stops
-        stop_options = [
-            {"value": stop['stop_id'], "label": f"{stop['stop_name']} ({stop['stop_id']})"}
-            for stop in self.available_stops
-        ]
-
-        # Sort by label for better UX
-        stop_options.sort(key=lambda x: x['label'])
+        # Selector options for ALL stops, already sorted by name, or only the
+        # search matches on large feeds
+        if self._stop_search_options is not None:
+            stop_options = self._stop_search_options
+        else:
+            stop_options = self._stop_options
         
-        _LOGGER.info("🔍 Creating dropdown with %d stops options", len(stop_options))
-        _LOGGER.debug("🔍 First few options: %s", stop_options[:3])
+        _LOGGER.debug("Creating dropdown with %d stops options", len(stop_options))
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("First few options: %s", stop_options[:3])
         
         return self.async_show_form(
             step_id="select_stops",
@@ -193,11 +636,7 @@ class GTFSPerformantConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         schema_dict = {}
 
         # Get stop info for display
-        stop_id_to_name = {
-            stop['stop_id']: stop['stop_name']
-            for stop in self.available_stops
-            if stop['stop_id'] in self.selected_stops
-        }
+        stop_id_to_name = self._selected_id_to_name
 
         # Add fields for each existing group
         for idx, group in enumerate(self.stop_groups):
@@ -214,9 +653,7 @@ class GTFSPerformantConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             groups_summary = "No groups auto-detected (all stops have unique names)"
 
         # List ungrouped stops
-        grouped_stop_ids = set()
-        for g in self.stop_groups:
-            grouped_stop_ids.update(g["stops"])
+        grouped_stop_ids = {s for g in self.stop_groups for s in g["stops"]}
         ungrouped = [
             f"{stop_id_to_name.get(sid, sid)} ({sid})"
             for sid in self.selected_stops
@@ -275,16 +712,9 @@ class GTFSPerformantConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         # Discover which routes serve the selected stops
         await self._discover_relevant_routes()
 
-        # Create selector options for routes
-        route_options = [
-            {"value": route['route_id'], "label": f"{route.get('route_short_name', route['route_id'])} - {route.get('route_long_name', '')}"}
-            for route in self.available_routes
-        ]
-
-        # Sort by label for better UX
-        route_options.sort(key=lambda x: x['label'])
+        route_options = self._route_options
         
-        _LOGGER.info("🔍 Creating dropdown with %d route options", len(route_options))
+        _LOGGER.debug("Creating dropdown with %d route options", len(route_options))
         
         return self.async_show_form(
             step_id="select_routes",
@@ -331,11 +761,7 @@ class GTFSPerformantConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             )
 
         # Build summary information
-        stop_id_to_name = {
-            stop['stop_id']: stop['stop_name']
-            for stop in self.available_stops
-            if stop['stop_id'] in self.selected_stops
-        }
+        stop_id_to_name = self._selected_id_to_name
 
         # Build groups summary
         if self.stop_groups:
@@ -347,9 +773,7 @@ class GTFSPerformantConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             groups_list = "None"
 
         # Build ungrouped stops list
-        grouped_ids = set()
-        for g in self.stop_groups:
-            grouped_ids.update(g.get("stops", []))
+        grouped_ids = {s for g in self.stop_groups for s in g.get("stops", [])}
         ungrouped_stops = [sid for sid in self.selected_stops if sid not in grouped_ids]
         if ungrouped_stops:
             ungrouped_list = "\n".join([
@@ -409,71 +833,194 @@ class GTFSPerformantConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             }
         )
     
+    async def _get_gtfs_path(self) -> Path | None:
+        """Return the static GTFS archive on disk, downloading it only once per URL.
+
+        The download is streamed into the disk cache rather than held in
+        memory. An archive cached by an earlier flow is reused when the HEAD
+        validators still match, or when the server answers 304. Archives
+        served without validators are only kept for this flow.
+        """
+        static_url = self.gtfs_data["static_url"]
+        if self._gtfs_path is not None and self._gtfs_path_url == static_url:
+            return self._gtfs_path
+
+        cache_dir = Path(self.hass.config.path(GTFS_CACHE_DIR))
+        archive_path = _cache_paths(cache_dir, static_url)[0]
+        cached = await self.hass.async_add_executor_job(
+            _load_cached_validators, cache_dir, static_url
+        )
+
+        validators = cached
+        if cached and _validators_match(cached, self._static_validators):
+            _LOGGER.info("GTFS archive unchanged since last download, using cache")
+            size = await self.hass.async_add_executor_job(archive_path.stat)
+            self._gtfs_size = size.st_size
+        else:
+            headers = {}
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+            session = async_get_clientsession(self.hass)
+            async with session.get(
+                static_url, headers=headers, timeout=GTFS_DOWNLOAD_TIMEOUT
+            ) as response:
+                if response.status == 304:
+                    _LOGGER.info("GTFS archive not modified, using cache")
+                    size = await self.hass.async_add_executor_job(archive_path.stat)
+                    self._gtfs_size = size.st_size
+                elif response.status != 200:
+                    _LOGGER.error("Failed to download GTFS: %s", response.status)
+                    return None
+                else:
+                    validators = _validators(response.headers)
+                    part = await self.hass.async_add_executor_job(_open_download, cache_dir)
+                    try:
+                        async for chunk in response.content.iter_chunked(
+                            GTFS_DOWNLOAD_CHUNK_SIZE
+                        ):
+                            await self.hass.async_add_executor_job(part.write, chunk)
+                    except BaseException:
+                        await self.hass.async_add_executor_job(_discard_download, part)
+                        raise
+                    archive_path, self._gtfs_size = await self.hass.async_add_executor_job(
+                        _finish_download, cache_dir, static_url, part, validators
+                    )
+                    if self._gtfs_temp_path is not None:
+                        # Archive of a previously entered URL
+                        await self.hass.async_add_executor_job(
+                            self._gtfs_temp_path.unlink, True
+                        )
+                    self._gtfs_temp_path = None if any(validators.values()) else archive_path
+
+        self._gtfs_path = archive_path
+        self._gtfs_path_url = static_url
+        self._gtfs_validators = validators
+        self._gtfs_zip = None
+        return self._gtfs_path
+
+    async def _get_gtfs_zip(self) -> zipfile.ZipFile | None:
+        """Return the static GTFS archive opened as a ZipFile."""
+        # The route index task and the flow steps may both ask for the
+        # archive, only one of them should download it
+        async with self._gtfs_lock:
+            path = await self._get_gtfs_path()
+            if path is None:
+                return None
+            if self._gtfs_zip is None:
+                self._gtfs_zip = await self.hass.async_add_executor_job(
+                    zipfile.ZipFile, path
+                )
+            return self._gtfs_zip
+
+    async def _async_build_route_index(
+        self, stops_future: asyncio.Future | None = None
+    ) -> tuple[dict[str, frozenset[str]], dict[str, Route]]:
+        """Download the archive if needed and index the routes of every stop.
+
+        Returns the stop_id -> route_ids index and the routes by route_id,
+        so route discovery needs no further archive access. When given
+        stops_future, the stops are parsed alongside and handed over through
+        it as soon as they are ready.
+        """
+        try:
+            gtfs_zip = await self._get_gtfs_zip()
+            if gtfs_zip is None:
+                return {}, {}
+
+            # One parse slot per static URL, the members are then read in
+            # parallel executor threads from the same ZipFile
+            sem = _PARSE_LOCKS.setdefault(self.gtfs_data["static_url"], asyncio.Semaphore(1))
+            async with sem:
+                routes_job = self.hass.async_add_executor_job(_read_routes, gtfs_zip)
+                index_job = self.hass.async_add_executor_job(_build_route_index_sync, gtfs_zip)
+                if stops_future is not None:
+                    stops_future.set_result(
+                        await self.hass.async_add_executor_job(_parse_stops_sync, gtfs_zip)
+                    )
+                routes_by_id, route_index = await asyncio.gather(routes_job, index_job)
+            return route_index, routes_by_id
+        except Exception as err:
+            if stops_future is not None and not stops_future.done():
+                stops_future.set_exception(err)
+            raise
+        finally:
+            if stops_future is not None and not stops_future.done():
+                stops_future.cancel()
+
+    @callback
+    def async_remove(self) -> None:
+        """Stop building the route index and release the archive."""
+        if self._route_index_task is not None:
+            self._route_index_task.cancel()
+        if self._gtfs_zip is not None:
+            # Members still being read keep the file open until they finish
+            self._gtfs_zip.close()
+        if self._gtfs_temp_path is not None:
+            self.hass.async_add_executor_job(self._gtfs_temp_path.unlink, True)
+            self._gtfs_temp_path = None
+
     async def _discover_gtfs_stops(self) -> dict:
         """Download GTFS and extract basic stop information."""
         try:
-            import zipfile
-            import csv
-            from io import BytesIO, StringIO
-            
-            _LOGGER.info("🔍 Downloading GTFS data for discovery...")
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.gtfs_data["static_url"]) as response:
-                    if response.status != 200:
-                        _LOGGER.error("Failed to download GTFS: %s", response.status)
-                        return {}
-                    
-                    data = await response.read()
-                    size_mb = len(data) / 1024 / 1024
-            
-            _LOGGER.info("📦 Downloaded %.1f MB, parsing GTFS...", size_mb)
+            store = _discovery_store(self.hass, self.gtfs_data["static_url"])
+            stored = None
+            if any(self._static_validators.values()):
+                stored = await store.async_load()
             
-            gtfs_zip = BytesIO(data)
-            
-            # Extract stops
-            with zipfile.ZipFile(gtfs_zip) as zf:
-                # Get agency info
-                agencies = []
-                try:
-                    with zf.open('agency.txt') as f:
-                        reader = csv.DictReader(StringIO(f.read().decode('utf-8')))
-                        agencies = [row['agency_name'] for row in reader]
-                        _LOGGER.info("✅ Found agencies: %s", agencies)
-                except Exception as e:
-                    _LOGGER.warning("Could not read agency.txt: %s", e)
+            if stored and _validators_match(stored["validators"], self._static_validators):
+                # Archive unchanged since the last flow, reuse its parsed stops
+                _LOGGER.info("GTFS unchanged, reusing stops from the last discovery")
+                agencies = stored["agencies"]
+                self.available_stops = {
+                    stop_id: sys.intern(stop_name) for stop_id, stop_name in stored["stops"]
+                }
+                size_mb = stored["size_mb"]
+            else:
+                _LOGGER.info("Downloading GTFS data for discovery...")
                 
-                # Get stops (only location_type = 0 for actual stops)
-                self.available_stops = []
-                try:
-                    with zf.open('stops.txt') as f:
-                        reader = csv.DictReader(StringIO(f.read().decode('utf-8')))
-                        for row in reader:
-                            # Handle different GTFS formats with flexible column access
-                            location_type = row.get('location_type', '0')
-                            if location_type == '0' or location_type == '':
-                                stop_id = row.get('stop_id', '')
-                                if stop_id:  # Only add if we have a stop_id
-                                    self.available_stops.append({
-                                        'stop_id': stop_id,
-                                        'stop_name': row.get('stop_name', 'Unknown'),
-                                        'stop_lat': float(row.get('stop_lat', 0)),
-                                        'stop_lon': float(row.get('stop_lon', 0))
-                                    })
-                    
-                    # Sort by name
-                    self.available_stops.sort(key=lambda x: x['stop_name'])
-                    _LOGGER.info("✅ Discovered %d stops", len(self.available_stops))
-                    
-                except Exception as e:
-                    _LOGGER.error("Error parsing stops: %s", e, exc_info=True)
+                gtfs_zip = await self._get_gtfs_zip()
+                if gtfs_zip is None:
                     return {}
+                size_mb = self._gtfs_size / 1024 / 1024
+                
+                _LOGGER.info("Downloaded %.1f MB, parsing GTFS...", size_mb)
+                
+                # Parse the stops while the route index is built next to them
+                stops_future = self.hass.loop.create_future()
+                self._route_index_task = self.hass.async_create_background_task(
+                    self._async_build_route_index(stops_future), f"{DOMAIN} route index"
+                )
+                agencies, self.available_stops = await stops_future
+                
+                if self.available_stops and any(self._gtfs_validators.values()):
+                    await store.async_save({
+                        "validators": self._gtfs_validators,
+                        "agencies": agencies,
+                        "stops": list(self.available_stops.items()),
+                        "size_mb": size_mb,
+                    })
             
             if not self.available_stops:
                 _LOGGER.error("No stops found in GTFS data after processing")
                 return {}
             
-            _LOGGER.info("✅ Discovery successful: found %d stops", len(self.available_stops))
+            self._stop_options = [
+                {"value": stop_id, "label": f"{stop_name} ({stop_id})"}
+                for stop_id, stop_name in self.available_stops.items()
+            ]
+            
+            # The user now picks stops, meanwhile scan stop_times.txt once for all
+            # of them so route discovery becomes a lookup (already running when
+            # the stops were parsed just now)
+            if self._route_index_task is None:
+                self._route_index_task = self.hass.async_create_background_task(
+                    self._async_build_route_index(), f"{DOMAIN} route index"
+                )
+            
+            _LOGGER.info("Discovery successful: found %d stops", len(self.available_stops))
             
             return {
                 "agencies": agencies[0] if agencies else "Unknown",
@@ -487,69 +1034,32 @@ class GTFSPerformantConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     
     async def _discover_relevant_routes(self) -> None:
         """Discover which routes serve the selected stops."""
-        if not self.selected_stops:
-            return
-        
         try:
-            import zipfile
-            import csv
-            from io import BytesIO, StringIO
+            route_index, routes_by_id = await self._route_index_task
             
-            _LOGGER.info("Discovering routes for %d stops...", len(self.selected_stops))
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.gtfs_data["static_url"]) as response:
-                    if response.status != 200:
-                        return
-                    
-                    data = await response.read()
+            if not self.selected_stops or len(self.selected_stops) >= len(self.available_stops):
+                # Every route qualifies
+                _LOGGER.info("No stop filter to apply, loading all routes...")
+                routes = list(routes_by_id.values())
+            else:
+                _LOGGER.info("Discovering routes for %d stops...", len(self.selected_stops))
+                route_ids = frozenset().union(
+                    *(route_index.get(stop_id, ()) for stop_id in self.selected_stops)
+                )
+                routes = [routes_by_id[route_id] for route_id in route_ids if route_id in routes_by_id]
             
-            gtfs_zip = BytesIO(data)
+            # Sort by route name
+            routes.sort(key=lambda x: x.route_short_name)
+            self.available_routes = routes
             
-            with zipfile.ZipFile(gtfs_zip) as zf:
-                # First, get trips for our selected stops
-                stop_trips = set()
-                try:
-                    with zf.open('stop_times.txt') as f:
-                        reader = csv.DictReader(StringIO(f.read().decode('utf-8')))
-                        for row in reader:
-                            if row.get('stop_id') in self.selected_stops:
-                                stop_trips.add(row.get('trip_id'))
-                except:
-                    return
-                
-                # Then, get routes for those trips  
-                route_ids = set()
-                try:
-                    with zf.open('trips.txt') as f:
-                        reader = csv.DictReader(StringIO(f.read().decode('utf-8')))
-                        for row in reader:
-                            if row.get('trip_id') in stop_trips:
-                                route_ids.add(row.get('route_id'))
-                except:
-                    return
-                
-                # Finally, get route details
-                try:
-                    with zf.open('routes.txt') as f:
-                        reader = csv.DictReader(StringIO(f.read().decode('utf-8')))
-                        self.available_routes = [
-                            {
-                                'route_id': row['route_id'],
-                                'route_short_name': row.get('route_short_name', ''),
-                                'route_long_name': row.get('route_long_name', ''),
-                                'route_type': row.get('route_type', '0')
-                            }
-                            for row in reader
-                            if row.get('route_id') in route_ids
-                        ]
-                    
-                    # Sort by route name
-                    self.available_routes.sort(key=lambda x: x.get('route_short_name', x['route_id']))
-                    
-                except Exception as e:
-                    _LOGGER.error("Error parsing routes: %s", e)
-                    return
+            # Create selector options for routes, sorted by label for better UX
+            self._route_options = sorted(
+                (
+                    {"value": route.route_id, "label": f"{route.route_short_name} - {route.route_long_name}"}
+                    for route in self.available_routes
+                ),
+                key=lambda x: x['label'],
+            )
             
             _LOGGER.info("Discovered %d routes serving selected stops", len(self.available_routes))
         
@@ -561,18 +1071,9 @@ class GTFSPerformantConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if len(self.selected_stops) < 2:
             return
 
-        # Build a map of stop_id -> stop_name for selected stops
-        selected_stop_info = {
-            stop['stop_id']: stop['stop_name']
-            for stop in self.available_stops
-            if stop['stop_id'] in self.selected_stops
-        }
-
         # Group stops by name
-        name_to_stops: dict[str, list[str]] = {}
-        for stop_id, stop_name in selected_stop_info.items():
-            if stop_name not in name_to_stops:
-                name_to_stops[stop_name] = []
+        name_to_stops: defaultdict[str, list[str]] = defaultdict(list)
+        for stop_id, stop_name in self._selected_id_to_name.items():
             name_to_stops[stop_name].append(stop_id)
 
         # Create groups for names with multiple stops
@@ -588,22 +1089,6 @@ class GTFSPerformantConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if self.stop_groups:
             _LOGGER.info("Created %d automatic stop groups", len(self.stop_groups))
 
-    def _check_for_duplicate_stops(self) -> bool:
-        """Check if selected stops have potential duplicates."""
-        if len(self.selected_stops) < 2:
-            return False
-
-        # Simple duplicate check based on similar names
-        stop_names = [stop['stop_name'].lower() for stop in self.available_stops if stop['stop_id'] in self.selected_stops]
-
-        # Check for similar names (indicating duplicates)
-        for i, name1 in enumerate(stop_names):
-            for name2 in stop_names[i+1:]:
-                if name1 in name2 or name2 in name1:
-                    return True
-
-        return False
-    
     async def async_step_create_groups(
         self, user_input: dict[str, str] | None = None
     ) -> FlowResult:
@@ -631,8 +1116,8 @@ class GTFSPerformantConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         
         # Show form for creating a group
         selected_stop_details = "\n".join([
-            f"• {stop['stop_name']} ({stop['stop_id']})"
-            for stop in self.available_stops if stop['stop_id'] in self.selected_stops
+            f"• {stop_name} ({stop_id})"
+            for stop_id, stop_name in self._selected_id_to_name.items()
         ])
         
         return self.async_show_form(
@@ -1,12 +1,45 @@
 """SQLite database layer for GTFS data with optimized schema."""
 import aiosqlite
+import asyncio
 import logging
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 _LOGGER = logging.getLogger(__name__)
 
+# Read-only connections for the query methods. With WAL they read the last
+# committed data while the loader or the realtime writer holds a transaction.
+READER_CONNECTIONS = 2
+
+# Tables keyed by their primary key alone, without a separate rowid B-tree
+WITHOUT_ROWID_TABLES = ("agency", "routes", "stop_times", "calendar", "user_config")
+
+# Secondary indexes of the static GTFS tables as (name, table and columns).
+# They are dropped while the loader bulk inserts and rebuilt afterwards, see
+# GTFSDatabase.drop_indexes.
+INDEXES = [
+    ("idx_stops_location", "stops(stop_lat, stop_lon)"),
+    ("idx_stops_duplicate", "stops(duplicate_group_id)"),
+    ("idx_routes_type", "routes(route_type)"),
+    ("idx_trips_route", "trips(route_id)"),
+    ("idx_trips_service", "trips(service_id)"),
+    # Realtime rows are matched to stop_times on (trip_id, stop_id)
+    ("idx_stop_times_trip_stop", "stop_times(trip_id, stop_id)"),
+    # Covers the departures lookup (stop_id IN ... AND departure_time >= ?)
+    ("idx_stop_times_stop_dep", "stop_times(stop_id, departure_time)"),
+    ("idx_calendar_dates_date", "calendar_dates(date)"),
+    ("idx_calendar_dates_service", "calendar_dates(service_id)"),
+]
+# Indexes of the realtime table, which the loader does not fill
+REALTIME_INDEXES = [
+    # Serves the per-stop lookups that keep only recent updates; the primary
+    # key already covers (trip_id, stop_id)
+    ("idx_realtime_stop_ts", "realtime_updates(stop_id, timestamp DESC, arrival_time)"),
+]
+
 
 class GTFSDatabase:
     """Efficient SQLite database for GTFS data with optimized indexes."""
@@ -15,12 +48,43 @@ class GTFSDatabase:
         """Initialize the database."""
         self.db_path = db_path
         self._connection: Optional[aiosqlite.Connection] = None
+        self._readers: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._reader_count = 0  # readers opened, in the queue or borrowed
+        # Held for each write transaction on _connection: a GTFS load or a
+        # realtime update. They would otherwise commit each other's rows.
+        self.write_lock = asyncio.Lock()
     
     async def async_init(self) -> None:
         """Initialize database connection and create schema."""
         self._connection = await aiosqlite.connect(self.db_path)
+        self._connection.row_factory = aiosqlite.Row
+        await self._configure_connection()
         await self._create_schema()
-        await self._create_indexes()
+        await self.create_indexes()
+        await self._connection.commit()
+
+        # Opened once the writer has switched the database to WAL
+        for _ in range(READER_CONNECTIONS):
+            reader = await aiosqlite.connect(self.db_path)
+            reader.row_factory = aiosqlite.Row
+            await reader.execute("PRAGMA query_only=1")
+            await reader.execute("PRAGMA mmap_size=268435456")
+            await reader.execute("PRAGMA temp_store=MEMORY")
+            self._readers.put_nowait(reader)
+            self._reader_count += 1
+
+    async def _configure_connection(self) -> None:
+        """Tune SQLite for frequent departure reads alongside realtime writes."""
+        pragmas = [
+            "PRAGMA journal_mode=WAL",  # readers don't block the realtime writer
+            "PRAGMA synchronous=NORMAL",  # safe with WAL, avoids an fsync per commit
+            "PRAGMA mmap_size=268435456",  # 256 MB memory-mapped reads
+            "PRAGMA cache_size=-65536",  # 64 MB page cache keeps stop_times hot
+            "PRAGMA temp_store=MEMORY",
+        ]
+
+        for pragma_sql in pragmas:
+            await self._connection.execute(pragma_sql)
 
     async def is_data_loaded(self, static_url: str) -> bool:
         """Check if database has valid data for the given GTFS URL."""
@@ -84,6 +148,17 @@ class GTFSDatabase:
     async def _create_schema(self) -> None:
         """Create database schema optimized for GTFS queries."""
         cursor = await self._connection.cursor()
+
+        # Databases from before the WITHOUT ROWID tables are rebuilt. All of
+        # their contents come from the feed, the next load refills them.
+        await cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'stop_times'"
+        )
+        existing = await cursor.fetchone()
+        if existing and "WITHOUT ROWID" not in existing[0]:
+            _LOGGER.info("Rebuilding GTFS tables as WITHOUT ROWID, data will be reloaded")
+            for table in WITHOUT_ROWID_TABLES + ("stops", "trips", "calendar_dates"):
+                await cursor.execute(f"DROP TABLE IF EXISTS {table}")
         
         # Create optimized tables
         await cursor.execute("""
@@ -95,7 +170,7 @@ class GTFSDatabase:
                 agency_lang TEXT,
                 agency_phone TEXT,
                 agency_fare_url TEXT
-            )
+            ) WITHOUT ROWID
         """)
         
         await cursor.execute("""
@@ -127,7 +202,7 @@ class GTFSDatabase:
                 route_color TEXT,
                 route_text_color TEXT,
                 route_sort_order INTEGER DEFAULT 0
-            )
+            ) WITHOUT ROWID
         """)
         
         await cursor.execute("""
@@ -141,8 +216,7 @@ class GTFSDatabase:
                 block_id TEXT,
                 shape_id TEXT,
                 wheelchair_accessible INTEGER DEFAULT 0,
-                bikes_allowed INTEGER DEFAULT 0,
-                FOREIGN KEY (route_id) REFERENCES routes(route_id)
+                bikes_allowed INTEGER DEFAULT 0
             )
         """)
         
@@ -158,10 +232,8 @@ class GTFSDatabase:
                 drop_off_type INTEGER DEFAULT 0,
                 shape_dist_traveled REAL,
                 timepoint INTEGER DEFAULT 1,
-                PRIMARY KEY (trip_id, stop_sequence),
-                FOREIGN KEY (trip_id) REFERENCES trips(trip_id),
-                FOREIGN KEY (stop_id) REFERENCES stops(stop_id)
-            )
+                PRIMARY KEY (trip_id, stop_sequence)
+            ) WITHOUT ROWID
         """)
         
         await cursor.execute("""
@@ -176,7 +248,7 @@ class GTFSDatabase:
                 sunday INTEGER DEFAULT 0,
                 start_date TEXT,
                 end_date TEXT
-            )
+            ) WITHOUT ROWID
         """)
 
         await cursor.execute("""
@@ -212,65 +284,72 @@ class GTFSDatabase:
             CREATE TABLE IF NOT EXISTS user_config (
                 config_key TEXT PRIMARY KEY,
                 config_value TEXT NOT NULL
-            )
+            ) WITHOUT ROWID
         """)
         
         await self._connection.commit()
     
-    async def _create_indexes(self) -> None:
-        """Create optimized indexes for query performance."""
+    async def create_indexes(self) -> None:
+        """Create optimized indexes for query performance.
+
+        Not committed here, so the loader can rebuild them inside its transaction.
+        """
         cursor = await self._connection.cursor()
-        
-        # Performance-critical indexes
-        indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_stops_location ON stops(stop_lat, stop_lon)",
-            "CREATE INDEX IF NOT EXISTS idx_stops_duplicate ON stops(duplicate_group_id)",
-            "CREATE INDEX IF NOT EXISTS idx_routes_type ON routes(route_type)",
-            "CREATE INDEX IF NOT EXISTS idx_trips_route ON trips(route_id)",
-            "CREATE INDEX IF NOT EXISTS idx_trips_service ON trips(service_id)",
-            "CREATE INDEX IF NOT EXISTS idx_stop_times_trip ON stop_times(trip_id)",
-            "CREATE INDEX IF NOT EXISTS idx_stop_times_stop ON stop_times(stop_id)",
-            "CREATE INDEX IF NOT EXISTS idx_realtime_trip_stop ON realtime_updates(trip_id, stop_id)",
-            "CREATE INDEX IF NOT EXISTS idx_realtime_timestamp ON realtime_updates(timestamp)",
-            "CREATE INDEX IF NOT EXISTS idx_calendar_dates_date ON calendar_dates(date)",
-            "CREATE INDEX IF NOT EXISTS idx_calendar_dates_service ON calendar_dates(service_id)",
-        ]
-        
-        for index_sql in indexes:
-            await cursor.execute(index_sql)
-        
-        await self._connection.commit()
+        for name, definition in INDEXES + REALTIME_INDEXES:
+            await cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+        # superseded by idx_stop_times_stop_dep and idx_stop_times_trip_stop
+        await cursor.execute("DROP INDEX IF EXISTS idx_stop_times_stop")
+        await cursor.execute("DROP INDEX IF EXISTS idx_stop_times_trip")
+        # superseded by idx_realtime_stop_ts and the primary key
+        await cursor.execute("DROP INDEX IF EXISTS idx_realtime_trip_stop")
+        await cursor.execute("DROP INDEX IF EXISTS idx_realtime_timestamp")
+
+    async def drop_indexes(self) -> None:
+        """Drop the secondary indexes so a bulk load only maintains primary keys."""
+        cursor = await self._connection.cursor()
+        for name, _ in INDEXES:
+            await cursor.execute(f"DROP INDEX IF EXISTS {name}")
     
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a read-only connection, waiting for one if all are in use."""
+        reader = await self._readers.get()
+        try:
+            yield reader
+        finally:
+            self._readers.put_nowait(reader)
+
+    async def _fetchall(self, sql: str, parameters=()) -> list[aiosqlite.Row]:
+        """Run a query on a read-only connection and return all rows."""
+        async with self._reader() as reader:
+            async with reader.execute(sql, parameters) as cursor:
+                return await cursor.fetchall()
+
     async def get_all_stops(self) -> list[dict]:
         """Get all stops ordered by name."""
-        cursor = await self._connection.cursor()
-        await cursor.execute("""
+        rows = await self._fetchall("""
             SELECT stop_id, stop_name, stop_lat, stop_lon, duplicate_group_id, is_duplicate
             FROM stops
             WHERE location_type = 0
             ORDER BY stop_name
         """)
-        rows = await cursor.fetchall()
-        return [dict(zip([col[0] for col in cursor.description], row)) for row in rows]
+        return [dict(row) for row in rows]
 
     async def get_stop_names(self, stop_ids: list[str]) -> dict[str, str]:
         """Get stop names for a list of stop IDs."""
         if not stop_ids:
             return {}
-        cursor = await self._connection.cursor()
         placeholders = ",".join("?" * len(stop_ids))
-        await cursor.execute(f"""
+        rows = await self._fetchall(f"""
             SELECT stop_id, stop_name
             FROM stops
             WHERE stop_id IN ({placeholders})
         """, stop_ids)
-        rows = await cursor.fetchall()
         return {row[0]: row[1] for row in rows}
 
     async def get_routes_for_stop(self, stop_id: str) -> list[dict]:
         """Get all routes that serve a specific stop."""
-        cursor = await self._connection.cursor()
-        await cursor.execute("""
+        rows = await self._fetchall("""
             SELECT DISTINCT r.route_id, r.route_short_name, r.route_long_name, r.route_type
             FROM routes r
             JOIN trips t ON r.route_id = t.route_id
@@ -278,25 +357,21 @@ class GTFSDatabase:
             WHERE st.stop_id = ?
             ORDER BY r.route_sort_order, r.route_short_name
         """, (stop_id,))
-        rows = await cursor.fetchall()
-        return [dict(zip([col[0] for col in cursor.description], row)) for row in rows]
+        return [dict(row) for row in rows]
     
     async def get_stops_in_group(self, group_id: str) -> list[dict]:
         """Get all stops in a duplicate group."""
-        cursor = await self._connection.cursor()
-        await cursor.execute("""
+        rows = await self._fetchall("""
             SELECT stop_id, stop_name, stop_lat, stop_lon
             FROM stops
             WHERE duplicate_group_id = ?
             ORDER BY stop_name
         """, (group_id,))
-        rows = await cursor.fetchall()
-        return [dict(zip([col[0] for col in cursor.description], row)) for row in rows]
+        return [dict(row) for row in rows]
     
     async def get_realtime_departures(self, stop_id: str, limit: int = 10) -> list[dict]:
         """Get realtime departures for a stop with schedule info."""
-        cursor = await self._connection.cursor()
-        await cursor.execute("""
+        rows = await self._fetchall("""
             SELECT
                 rt.trip_id,
                 r.route_id,
@@ -316,24 +391,31 @@ class GTFSDatabase:
             JOIN routes r ON t.route_id = r.route_id
             JOIN stop_times st ON rt.trip_id = st.trip_id AND rt.stop_id = st.stop_id
             WHERE rt.stop_id = ?
-            AND rt.timestamp > strftime('%s', 'now') - 300
+            AND rt.timestamp > ?
             ORDER BY rt.arrival_time ASC
             LIMIT ?
-        """, (stop_id, limit))
-        rows = await cursor.fetchall()
-        return [dict(zip([col[0] for col in cursor.description], row)) for row in rows]
+        """, (stop_id, int(time.time()) - 300, limit))
+        return [dict(row) for row in rows]
 
     async def get_scheduled_departures(self, stop_id: str, limit: int = 10) -> list[dict]:
-        """Get upcoming scheduled departures for a stop - timezone aware.
+        """Get upcoming scheduled departures for a stop - timezone aware."""
+        departures = await self.get_scheduled_departures_bulk([stop_id], per_stop_limit=limit)
+        return departures.get(stop_id, [])
+
+    async def get_scheduled_departures_bulk(
+        self, stop_ids: list[str], per_stop_limit: int = 10
+    ) -> dict[str, list[dict]]:
+        """Get upcoming scheduled departures for several stops in a single query.
 
         Handles GTFS service days that extend past midnight (times 24:00-28:00).
+        Returns {stop_id: departures} with at most per_stop_limit departures per stop.
         """
-        cursor = await self._connection.cursor()
+        if not stop_ids:
+            return {}
 
         # Get agency timezone from database
-        await cursor.execute("SELECT agency_timezone FROM agency LIMIT 1")
-        agency_tz_result = await cursor.fetchone()
-        agency_tz = agency_tz_result[0] if agency_tz_result else None
+        agency_tz_rows = await self._fetchall("SELECT agency_timezone FROM agency LIMIT 1")
+        agency_tz = agency_tz_rows[0][0] if agency_tz_rows else None
 
         # Get current time in GTFS timezone
         try:
@@ -363,131 +445,157 @@ class GTFSDatabase:
         hours, mins, secs = map(int, current_time.split(':'))
         current_time_as_yesterday = f"{hours + 24:02d}:{mins:02d}:{secs:02d}"
 
-        _LOGGER.debug("Querying departures for stop=%s at %s (tz=%s), also checking yesterday's service >= %s",
-                     stop_id, current_time, agency_tz or "system", current_time_as_yesterday)
+        _LOGGER.debug("Querying departures for %d stops at %s (tz=%s), also checking yesterday's service >= %s",
+                     len(stop_ids), current_time, agency_tz or "system", current_time_as_yesterday)
+
+        stop_ids = list(stop_ids)
+        placeholders = ",".join("?" * len(stop_ids))
 
-        # Query scheduled departures combining:
+        # Realtime overlay: only the newest update per (trip, stop) is joined,
+        # so older feed snapshots still in the table can't duplicate a departure.
+        #
+        # Query scheduled departures for all stops at once, combining:
         # 1. Today's services with normal times (>= current_time)
         # 2. Yesterday's services that extend past midnight (times 24:00-28:00 >= current_time + 24h)
-        # We use UNION to combine both queries cleanly
+        # We use UNION to combine both queries cleanly, then ROW_NUMBER() keeps
+        # only the next per_stop_limit departures of each stop.
         #
         # Service runs if:
         # - calendar_dates says exception_type=1 for this date (service explicitly added)
         # - OR (calendar says weekday=1 AND date in range) AND NOT (calendar_dates says exception_type=2)
         # - OR no calendar info exists (fallback for feeds without calendar data)
-        await cursor.execute(f"""
-            SELECT * FROM (
-                -- Today's services (both normal and past-midnight times)
-                SELECT DISTINCT
-                    st.trip_id,
-                    r.route_id,
-                    r.route_short_name,
-                    r.route_long_name,
-                    r.route_color,
-                    COALESCE(
-                        NULLIF(st.stop_headsign, ''),
-                        NULLIF(t.trip_headsign, ''),
-                        NULLIF(r.route_long_name, '')
-                    ) as trip_headsign,
-                    t.direction_id,
-                    st.departure_time as scheduled_arrival,
-                    st.departure_time as scheduled_departure,
-                    COALESCE(rt.arrival_delay, 0) as arrival_delay,
-                    rt.vehicle_id,
-                    st.departure_time as sort_time,
-                    0 as is_yesterday_service
-                FROM stop_times st
-                JOIN trips t ON st.trip_id = t.trip_id
-                JOIN routes r ON t.route_id = r.route_id
-                LEFT JOIN calendar c ON t.service_id = c.service_id
-                LEFT JOIN calendar_dates cd_add ON t.service_id = cd_add.service_id AND cd_add.date = ? AND cd_add.exception_type = 1
-                LEFT JOIN calendar_dates cd_remove ON t.service_id = cd_remove.service_id AND cd_remove.date = ? AND cd_remove.exception_type = 2
-                LEFT JOIN realtime_updates rt ON st.trip_id = rt.trip_id AND st.stop_id = rt.stop_id
-                WHERE st.stop_id = ?
-                AND st.departure_time >= ?
-                AND st.departure_time < '28:00:00'
-                AND cd_remove.service_id IS NULL  -- Not explicitly removed
-                AND (
-                    cd_add.service_id IS NOT NULL  -- Explicitly added via calendar_dates
-                    OR (c.{weekday} = 1 AND c.start_date <= ? AND c.end_date >= ?)  -- Regular calendar pattern
-                    OR (c.service_id IS NULL AND cd_add.service_id IS NULL AND NOT EXISTS (SELECT 1 FROM calendar LIMIT 1))  -- No calendar data at all
+        rows = await self._fetchall(f"""
+            WITH latest_rt AS (
+                SELECT trip_id, stop_id, arrival_delay, departure_delay, vehicle_id
+                FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY trip_id, stop_id ORDER BY timestamp DESC) as update_rank
+                    FROM realtime_updates
+                    WHERE stop_id IN ({placeholders})
                 )
-
-                UNION
-
-                -- Yesterday's services extending past midnight (times 24:00+)
-                SELECT DISTINCT
-                    st.trip_id,
-                    r.route_id,
-                    r.route_short_name,
-                    r.route_long_name,
-                    r.route_color,
-                    COALESCE(
-                        NULLIF(st.stop_headsign, ''),
-                        NULLIF(t.trip_headsign, ''),
-                        NULLIF(r.route_long_name, '')
-                    ) as trip_headsign,
-                    t.direction_id,
-                    st.departure_time as scheduled_arrival,
-                    st.departure_time as scheduled_departure,
-                    COALESCE(rt.arrival_delay, 0) as arrival_delay,
-                    rt.vehicle_id,
-                    -- Convert 24:xx to 00:xx for proper sorting against today's times
-                    substr('0' || (CAST(substr(st.departure_time, 1, 2) AS INTEGER) - 24), -2) || substr(st.departure_time, 3) as sort_time,
-                    1 as is_yesterday_service
-                FROM stop_times st
-                JOIN trips t ON st.trip_id = t.trip_id
-                JOIN routes r ON t.route_id = r.route_id
-                LEFT JOIN calendar c ON t.service_id = c.service_id
-                LEFT JOIN calendar_dates cd_add ON t.service_id = cd_add.service_id AND cd_add.date = ? AND cd_add.exception_type = 1
-                LEFT JOIN calendar_dates cd_remove ON t.service_id = cd_remove.service_id AND cd_remove.date = ? AND cd_remove.exception_type = 2
-                LEFT JOIN realtime_updates rt ON st.trip_id = rt.trip_id AND st.stop_id = rt.stop_id
-                WHERE st.stop_id = ?
-                AND st.departure_time >= ?
-                AND st.departure_time < '28:00:00'
-                AND cd_remove.service_id IS NULL  -- Not explicitly removed
-                AND (
-                    cd_add.service_id IS NOT NULL  -- Explicitly added via calendar_dates
-                    OR (c.{yesterday_weekday} = 1 AND c.start_date <= ? AND c.end_date >= ?)  -- Regular calendar pattern
-                    OR (c.service_id IS NULL AND cd_add.service_id IS NULL AND NOT EXISTS (SELECT 1 FROM calendar LIMIT 1))  -- No calendar data at all
+                WHERE update_rank = 1
+            )
+            SELECT * FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY stop_id ORDER BY sort_time) as stop_rank
+                FROM (
+                    -- Today's services (both normal and past-midnight times)
+                    SELECT DISTINCT
+                        st.stop_id,
+                        st.trip_id,
+                        r.route_id,
+                        r.route_short_name,
+                        r.route_long_name,
+                        r.route_color,
+                        COALESCE(
+                            NULLIF(st.stop_headsign, ''),
+                            NULLIF(t.trip_headsign, ''),
+                            NULLIF(r.route_long_name, '')
+                        ) as trip_headsign,
+                        t.direction_id,
+                        st.departure_time as scheduled_arrival,
+                        st.departure_time as scheduled_departure,
+                        COALESCE(rt.arrival_delay, 0) as arrival_delay,
+                        COALESCE(rt.departure_delay, rt.arrival_delay, 0) as departure_delay,
+                        rt.vehicle_id,
+                        st.departure_time as sort_time,
+                        0 as is_yesterday_service
+                    FROM stop_times st
+                    JOIN trips t ON st.trip_id = t.trip_id
+                    JOIN routes r ON t.route_id = r.route_id
+                    LEFT JOIN calendar c ON t.service_id = c.service_id
+                    LEFT JOIN calendar_dates cd_add ON t.service_id = cd_add.service_id AND cd_add.date = ? AND cd_add.exception_type = 1
+                    LEFT JOIN calendar_dates cd_remove ON t.service_id = cd_remove.service_id AND cd_remove.date = ? AND cd_remove.exception_type = 2
+                    LEFT JOIN latest_rt rt ON st.trip_id = rt.trip_id AND st.stop_id = rt.stop_id
+                    WHERE st.stop_id IN ({placeholders})
+                    AND st.departure_time >= ?
+                    AND st.departure_time < '28:00:00'
+                    AND cd_remove.service_id IS NULL  -- Not explicitly removed
+                    AND (
+                        cd_add.service_id IS NOT NULL  -- Explicitly added via calendar_dates
+                        OR (c.{weekday} = 1 AND c.start_date <= ? AND c.end_date >= ?)  -- Regular calendar pattern
+                        OR (c.service_id IS NULL AND cd_add.service_id IS NULL AND NOT EXISTS (SELECT 1 FROM calendar LIMIT 1))  -- No calendar data at all
+                    )
+
+                    UNION
+
+                    -- Yesterday's services extending past midnight (times 24:00+)
+                    SELECT DISTINCT
+                        st.stop_id,
+                        st.trip_id,
+                        r.route_id,
+                        r.route_short_name,
+                        r.route_long_name,
+                        r.route_color,
+                        COALESCE(
+                            NULLIF(st.stop_headsign, ''),
+                            NULLIF(t.trip_headsign, ''),
+                            NULLIF(r.route_long_name, '')
+                        ) as trip_headsign,
+                        t.direction_id,
+                        st.departure_time as scheduled_arrival,
+                        st.departure_time as scheduled_departure,
+                        COALESCE(rt.arrival_delay, 0) as arrival_delay,
+                        COALESCE(rt.departure_delay, rt.arrival_delay, 0) as departure_delay,
+                        rt.vehicle_id,
+                        -- Convert 24:xx to 00:xx for proper sorting against today's times
+                        substr('0' || (CAST(substr(st.departure_time, 1, 2) AS INTEGER) - 24), -2) || substr(st.departure_time, 3) as sort_time,
+                        1 as is_yesterday_service
+                    FROM stop_times st
+                    JOIN trips t ON st.trip_id = t.trip_id
+                    JOIN routes r ON t.route_id = r.route_id
+                    LEFT JOIN calendar c ON t.service_id = c.service_id
+                    LEFT JOIN calendar_dates cd_add ON t.service_id = cd_add.service_id AND cd_add.date = ? AND cd_add.exception_type = 1
+                    LEFT JOIN calendar_dates cd_remove ON t.service_id = cd_remove.service_id AND cd_remove.date = ? AND cd_remove.exception_type = 2
+                    LEFT JOIN latest_rt rt ON st.trip_id = rt.trip_id AND st.stop_id = rt.stop_id
+                    WHERE st.stop_id IN ({placeholders})
+                    AND st.departure_time >= ?
+                    AND st.departure_time < '28:00:00'
+                    AND cd_remove.service_id IS NULL  -- Not explicitly removed
+                    AND (
+                        cd_add.service_id IS NOT NULL  -- Explicitly added via calendar_dates
+                        OR (c.{yesterday_weekday} = 1 AND c.start_date <= ? AND c.end_date >= ?)  -- Regular calendar pattern
+                        OR (c.service_id IS NULL AND cd_add.service_id IS NULL AND NOT EXISTS (SELECT 1 FROM calendar LIMIT 1))  -- No calendar data at all
+                    )
                 )
             )
-            ORDER BY sort_time ASC
-            LIMIT ?
-        """, (today_date, today_date, stop_id, current_time, today_date, today_date,
-              yesterday_date, yesterday_date, stop_id, current_time_as_yesterday, yesterday_date, yesterday_date, limit))
-
-        rows = await cursor.fetchall()
-        results = [dict(zip([col[0] for col in cursor.description], row)) for row in rows]
-
-        # Convert past-midnight times (24:xx, 25:xx) to normal format for display
-        # ONLY for yesterday's services (is_yesterday_service = 1)
-        # Today's services with times >= 24:00 mean tomorrow, so keep them as-is for sensor.py
-        for result in results:
+            WHERE stop_rank <= ?
+            ORDER BY stop_id, sort_time ASC
+        """, (*stop_ids,
+              today_date, today_date, *stop_ids, current_time, today_date, today_date,
+              yesterday_date, yesterday_date, *stop_ids, current_time_as_yesterday, yesterday_date, yesterday_date,
+              per_stop_limit))
+
+        departures: dict[str, list[dict]] = {stop_id: [] for stop_id in stop_ids}
+        for row in rows:
+            result = dict(row)
+            result.pop('stop_rank', None)
+
+            # Convert past-midnight times (24:xx, 25:xx) to normal format for display
+            # ONLY for yesterday's services (is_yesterday_service = 1)
+            # Today's services with times >= 24:00 mean tomorrow, so keep them as-is for sensor.py
             scheduled = result.get('scheduled_arrival', '')
-            is_yesterday = result.get('is_yesterday_service', 0)
-            if scheduled and scheduled >= '24:00:00' and is_yesterday:
+            if scheduled and scheduled >= '24:00:00' and result.get('is_yesterday_service', 0):
                 hours = int(scheduled[:2]) - 24
                 result['scheduled_arrival'] = f"{hours:02d}{scheduled[2:]}"
                 result['scheduled_departure'] = f"{hours:02d}{scheduled[2:]}"
 
-        # Re-sort by the converted times
-        results.sort(key=lambda x: x.get('sort_time', '99:99:99'))
+            departures.setdefault(result['stop_id'], []).append(result)
 
-        return results[:limit]
+        return departures
 
     async def get_departures(self, stop_ids: list[str], limit: int = 10) -> list[dict]:
         """Get departures for multiple stops, sorted by time."""
-        all_departures = []
-        for stop_id in stop_ids:
-            deps = await self.get_scheduled_departures(stop_id, limit=limit)
-            all_departures.extend(deps)
+        departures = await self.get_scheduled_departures_bulk(stop_ids, per_stop_limit=limit)
+        all_departures = [dep for deps in departures.values() for dep in deps]
 
         # Sort by departure time and limit
         all_departures.sort(key=lambda x: x.get("scheduled_departure", "99:99:99"))
         return all_departures[:limit]
 
     async def async_close(self) -> None:
-        """Close database connection."""
+        """Close database connections."""
+        # Waits for borrowed readers to come back, so none is left open
+        for _ in range(self._reader_count):
+            await (await self._readers.get()).close()
+        self._reader_count = 0
         if self._connection:
             await self._connection.close()
\ No newline at end of file
@@ -1,15 +1,80 @@
 """Ultra-optimized GTFS data loader - streams everything, zero unnecessary parsing."""
+import asyncio
 import aiohttp
 import csv
 import logging
+import operator
+import os
+import sqlite3
+import tempfile
 import zipfile
-from io import BytesIO, StringIO
-from typing import List, Set, Optional, Dict
+from functools import lru_cache
+from io import TextIOWrapper
+from itertools import chain, islice
+from typing import Any, Iterable, Iterator, List, Set, Optional, Dict
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pa_csv
+except ImportError:  # pyarrow is optional, csv.reader is the fallback
+    pa = pc = pa_csv = None
 
 from .database import GTFSDatabase
 
 _LOGGER = logging.getLogger(__name__)
 
+# Rows collected from a file before they are written to the database
+BATCH_SIZE = 15000
+DOWNLOAD_CHUNK_SIZE = 1 << 20  # bytes written to disk at a time
+
+# Most ? parameters SQLite accepts in one statement (999 before 3.32)
+SQLITE_MAX_VARIABLES = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+
+
+def _row_extractor(header: List[str], columns: List[str], defaults: Dict[str, Any]):
+    """Build a function turning a csv.reader row into the values of columns.
+
+    Columns missing from the file take their default from defaults, or ''.
+    Blank fields of the columns in defaults take it as well, so numeric
+    columns get a number or NULL instead of an empty TEXT value. Numeric
+    strings are left to the INTEGER/REAL column affinity.
+    """
+    width = len(header)
+    missing = [col for col in columns if col not in header]
+    positions = {col: i for i, col in enumerate(header)}
+    positions.update({col: width + i for i, col in enumerate(missing)})
+    tail = [defaults.get(col, '') for col in missing]
+    blanks = [(positions[col], default) for col, default in defaults.items()
+              if col in columns and col not in missing]
+    getter = operator.itemgetter(*(positions[col] for col in columns))
+
+    def extract(row: List[str]) -> tuple:
+        if len(row) != width:
+            # Short rows are padded, extra trailing fields dropped
+            row = row[:width] + [''] * (width - len(row))
+        for i, default in blanks:
+            if not row[i]:
+                row[i] = default
+        return getter(row + tail if tail else row)
+
+    return extract
+
+
+@lru_cache(maxsize=32)
+def _insert_sql(verb: str, table: str, columns: tuple, row_count: int) -> str:
+    """Build a multi-row INSERT statement of row_count rows.
+
+    Cached, so the statement text of a full chunk is built once per load
+    instead of once per statement. sqlite3 finds its prepared statement by
+    that text, and the same string object makes the lookup cheap as well.
+    """
+    row_placeholders = f"({','.join('?' * len(columns))})"
+    return (
+        f"{verb} INTO {table} ({','.join(columns)}) "
+        f"VALUES {','.join([row_placeholders] * row_count)}"
+    )
+
 
 class GTFSLoader:
     """Ultra-optimized GTFS loader - pure streaming, no wasted memory."""
@@ -23,11 +88,16 @@ class GTFSLoader:
     ) -> None:
         self.database = database
         self.static_url = static_url
-        self.selected_stops = set(selected_stops) if selected_stops else set()
+        self.selected_stops = frozenset(selected_stops or ())
         self.selected_routes = set(selected_routes) if selected_routes else set()
-        self._gtfs_data: Optional[BytesIO] = None
+        # Routes chosen in the config flow, empty for all routes. Kept apart from
+        # selected_routes, which discovery replaces with the routes actually found.
+        self._route_filter = frozenset(self.selected_routes)
+        self._gtfs_path: Optional[str] = None  # downloaded archive, removed after the load
         self._discovered_trips: Set[str] = set()
-        self._stop_names: Dict[str, str] = {}  # Cache stop names for final destinations
+        self._stop_names: Dict[str, str] = {}  # All stop names, for final destinations
+        self._final_stop_ids: Dict[str, str] = {}  # trip_id -> last stop_id, for headsigns
+        self._loaded_route_ids: Set[str] = set()  # routes found in routes.txt
 
     async def async_load_gtfs_data(self, force_reload: bool = False) -> None:
         """Load GTFS data with ultra-efficient streaming - minimal memory, maximum speed.
@@ -51,27 +121,45 @@ class GTFSLoader:
 
         _LOGGER.info("⚠️ Starting ultra-optimized GTFS load for %d stops...", len(self.selected_stops))
 
-        # Clear existing data if reloading
-        if force_reload:
-            await self._clear_database()
-
-        # Step 1: Download GTFS file ONCE
-        await self._download_gtfs()
-        if not self._gtfs_data:
-            return
-
-        # Step 2: Pre-load stop names (needed for trip destinations)
-        await self._cache_stop_names()
-
-        # Step 3: Stream and discover which trips/routes we need
-        await self._discover_trips_and_routes()
-
-        # Step 4: Load all data in one pass with filtering
-        await self._load_all_data_streaming()
-
-        # Store metadata to avoid reload on next startup
-        _LOGGER.info("💾 Storing metadata for future fast startups...")
-        await self.database.store_metadata(self.static_url)
+        # Realtime updates share the writer connection, they wait for the load
+        # instead of committing or rolling back its transaction
+        async with self.database.write_lock:
+            # The whole load is one transaction: the batches below are not committed
+            # individually, store_metadata commits everything at the end. A failed
+            # reload also leaves the previous data in place. Opened explicitly, as
+            # sqlite3 would otherwise run the DROP INDEX statements in autocommit.
+            if not self.database._connection.in_transaction:
+                await self.database._connection.execute("BEGIN")
+            try:
+                # Inserting without the secondary indexes and building them once at
+                # the end is much cheaper than updating them row by row
+                await self.database.drop_indexes()
+
+                # Clear existing data if reloading
+                if force_reload:
+                    await self._clear_database()
+
+                # Step 1: Download GTFS file ONCE
+                await self._download_gtfs()
+                if not self._gtfs_path:
+                    await self.database._connection.rollback()
+                    return
+
+                # Step 2: Stream and discover which trips/routes we need
+                await self._discover_trips_and_routes()
+
+                # Step 3: Load all data in one pass with filtering
+                await self._load_all_data_streaming()
+                await self.database.create_indexes()
+
+                # Store metadata to avoid reload on next startup
+                _LOGGER.info("💾 Storing metadata for future fast startups...")
+                await self.database.store_metadata(self.static_url)
+            except BaseException:
+                await self.database._connection.rollback()
+                raise
+            finally:
+                await self._remove_download()
 
         _LOGGER.info("✅ GTFS load complete! %d trips serving your stops.", len(self._discovered_trips))
 
@@ -86,65 +174,97 @@ class GTFSLoader:
         await cursor.execute("DELETE FROM calendar_dates")
         await cursor.execute("DELETE FROM agency")
         await cursor.execute("DELETE FROM realtime_updates")
-        await self.database._connection.commit()
         _LOGGER.info("Cleared existing database data")
 
-    async def _cache_stop_names(self) -> None:
-        """Stream stops.txt once and cache only stop_id -> stop_name mapping."""
-        _LOGGER.info("Caching stop names...")
-        self._gtfs_data.seek(0)
-
-        try:
-            with zipfile.ZipFile(self._gtfs_data) as zf:
-                with zf.open('stops.txt') as f:
-                    reader = csv.DictReader(StringIO(f.read().decode('utf-8-sig')))
-                    # Only cache what we need - stop_id and stop_name
-                    self._stop_names = {
-                        row['stop_id']: row['stop_name']
-                        for row in reader
-                        if 'stop_id' in row and 'stop_name' in row
-                    }
-            _LOGGER.info("Cached %d stop names", len(self._stop_names))
-        except Exception as e:
-            _LOGGER.error("Error caching stop names: %s", e)
-            self._stop_names = {}
-
     async def _discover_trips_and_routes(self) -> None:
         """Stream stop_times.txt to discover only trips and routes for our stops.
 
         This is the KEY optimization - we never load all trips into memory.
         We stream once, extract just IDs, and use those for filtering later.
+        The same pass records the final stop of each trip for missing headsigns.
+        The scan runs in a worker thread, off the event loop.
         """
         _LOGGER.info("Discovering trips and routes for %d stops...", len(self.selected_stops))
-        self._gtfs_data.seek(0)
 
-        trip_ids = set()
-        route_ids = set()
+        def scan():
+            trip_ids = set()
+            route_ids = set()
+            # trip_id -> (max stop_sequence, its digit count, stop_id), collected
+            # in the same pass because the trips of our stops are only known
+            # once it is over. One entry per trip of the feed, not per row.
+            final_stops = {}
 
-        try:
-            with zipfile.ZipFile(self._gtfs_data) as zf:
+            with zipfile.ZipFile(self._gtfs_path) as zf:
                 # Stream stop_times - filter while reading
                 with zf.open('stop_times.txt') as f:
-                    reader = csv.DictReader(StringIO(f.read().decode('utf-8-sig')))
+                    reader = csv.reader(TextIOWrapper(f, encoding='utf-8-sig', newline=''))
+                    header = next(reader)
+                    stop_i = header.index('stop_id')
+                    trip_i = header.index('trip_id')
+                    seq_i = header.index('stop_sequence')
+                    width = max(stop_i, trip_i, seq_i) + 1
+                    # Locals, not attribute lookups, in the loop over every stop_time
+                    selected_stops = self.selected_stops
                     for row in reader:
+                        if len(row) < width:
+                            continue
+                        trip_id = row[trip_i]
+                        if not trip_id:
+                            continue
+                        stop_id = row[stop_i]
                         # Check if this stop is one we care about
-                        if row.get('stop_id') in self.selected_stops:
-                            trip_id = row.get('trip_id')
-                            if trip_id:
-                                trip_ids.add(trip_id)
+                        if stop_id in selected_stops:
+                            trip_ids.add(trip_id)
+
+                        raw_seq = row[seq_i]
+                        current = final_stops.get(trip_id)
+                        # Fewer characters than the digits of the current max
+                        # can't be a larger number, no need to parse them
+                        if current is not None and len(raw_seq) < current[1]:
+                            continue
+                        try:
+                            seq = int(raw_seq)
+                        except ValueError:
+                            continue
+                        if current is None or seq > current[0]:
+                            final_stops[trip_id] = (seq, len(str(seq)), stop_id)
 
                 _LOGGER.info("Found %d trips serving selected stops", len(trip_ids))
 
-                # Stream trips - get route_ids for our trips
+                # Stream trips - get route_ids for our trips, dropping the trips
+                # of routes the user did not select
+                route_filter = self._route_filter
+                kept_trips = set()
                 with zf.open('trips.txt') as f:
-                    reader = csv.DictReader(StringIO(f.read().decode('utf-8-sig')))
+                    reader = csv.reader(TextIOWrapper(f, encoding='utf-8-sig', newline=''))
+                    header = next(reader)
+                    trip_i = header.index('trip_id')
+                    route_i = header.index('route_id')
+                    width = max(trip_i, route_i) + 1
                     for row in reader:
-                        if row.get('trip_id') in trip_ids:
-                            route_id = row.get('route_id')
+                        if len(row) >= width and row[trip_i] in trip_ids:
+                            route_id = row[route_i]
+                            if route_filter and route_id not in route_filter:
+                                continue
+                            kept_trips.add(row[trip_i])
                             if route_id:
                                 route_ids.add(route_id)
 
+                if route_filter:
+                    trip_ids = kept_trips
+                    _LOGGER.info("Kept %d trips on the %d selected routes",
+                                 len(trip_ids), len(route_filter))
+
+            return trip_ids, route_ids, final_stops
+
+        try:
+            trip_ids, route_ids, final_stops = await asyncio.to_thread(scan)
             self._discovered_trips = trip_ids
+            self._final_stop_ids = {
+                trip_id: final_stops[trip_id][2]
+                for trip_id in trip_ids
+                if trip_id in final_stops
+            }
             self.selected_routes = route_ids
             _LOGGER.info("Discovered %d routes serving selected stops", len(route_ids))
 
@@ -155,9 +275,9 @@ class GTFSLoader:
         """Load ALL data in streaming fashion - filter while reading, never load into memory.
 
         This is the most efficient approach:
-        1. Stream each file once
+        1. Stream each file once, in a worker thread
         2. Filter rows as we read
-        3. Batch insert directly to DB
+        3. Batch insert directly to DB while the next batch is read
         4. Never accumulate Python lists
         """
         _LOGGER.info("Loading data with streaming filters...")
@@ -172,97 +292,105 @@ class GTFSLoader:
 
     async def _load_agency_streaming(self) -> None:
         """Stream and load agency (just first one)."""
-        if not self._gtfs_data:
+        if not self._gtfs_path:
             return
 
-        self._gtfs_data.seek(0)
+        columns = ['agency_id', 'agency_name', 'agency_url', 'agency_timezone',
+                   'agency_lang', 'agency_phone', 'agency_fare_url']
+
         try:
-            with zipfile.ZipFile(self._gtfs_data) as zf:
+            with zipfile.ZipFile(self._gtfs_path) as zf:
                 with zf.open('agency.txt') as f:
-                    reader = csv.DictReader(StringIO(f.read().decode('utf-8-sig')))
+                    reader = csv.reader(TextIOWrapper(f, encoding='utf-8-sig', newline=''))
+                    extract = _row_extractor(next(reader), columns, {'agency_id': 'default'})
                     # Just take first agency
-                    for i, row in enumerate(reader):
-                        if i == 0:  # Only first agency
-                            row.setdefault('agency_id', 'default')
-                            await self._batch_insert('agency',
-                                ['agency_id', 'agency_name', 'agency_url', 'agency_timezone',
-                                 'agency_lang', 'agency_phone', 'agency_fare_url'], [row])
+                    for row in reader:
+                        if row:
+                            await self._insert_rows('agency', columns, [extract(row)])
                             _LOGGER.info("Loaded agency")
                             break
         except Exception as e:
             _LOGGER.warning("Could not load agency: %s", e)
 
     async def _load_stops_streaming(self) -> None:
-        """Stream stops.txt and load only selected stops."""
-        if not self._gtfs_data or not self.selected_stops:
+        """Stream stops.txt and load only selected stops.
+
+        The same pass caches the names of all stops, the trips loader names
+        trips without headsign after their final stop.
+        """
+        if not self._gtfs_path or not self.selected_stops:
             return
 
-        self._gtfs_data.seek(0)
-        batch = []
-        count = 0
+        file_columns = ['stop_id', 'stop_code', 'stop_name', 'stop_lat', 'stop_lon',
+                        'zone_id', 'location_type', 'parent_station', 'wheelchair_boarding']
+        columns = file_columns + ['duplicate_group_id', 'is_duplicate']
+        not_grouped = ('', 0)
 
-        try:
-            with zipfile.ZipFile(self._gtfs_data) as zf:
+        def read_batches() -> Iterator[list]:
+            batch = []
+            with zipfile.ZipFile(self._gtfs_path) as zf:
                 with zf.open('stops.txt') as f:
-                    reader = csv.DictReader(StringIO(f.read().decode('utf-8-sig')))
+                    reader = csv.reader(TextIOWrapper(f, encoding='utf-8-sig', newline=''))
+                    header = next(reader)
+                    stop_i = header.index('stop_id')
+                    name_i = header.index('stop_name') if 'stop_name' in header else None
+                    extract = _row_extractor(header, file_columns, {
+                        'stop_lat': None,
+                        'stop_lon': None,
+                        'location_type': 0,
+                        'wheelchair_boarding': 0,
+                    })
+                    selected_stops = self.selected_stops
+                    stop_names = self._stop_names
                     for row in reader:
+                        if len(row) <= stop_i:
+                            continue
+                        if name_i is not None and len(row) > name_i:
+                            stop_names[row[stop_i]] = row[name_i]
                         # Filter WHILE reading - don't accumulate
-                        if row.get('stop_id') in self.selected_stops:
-                            row.setdefault('stop_code', '')
-                            row.setdefault('zone_id', '')
-                            row.setdefault('location_type', '0')
-                            row.setdefault('parent_station', '')
-                            row.setdefault('wheelchair_boarding', '0')
-                            row['duplicate_group_id'] = ''
-                            row['is_duplicate'] = '0'
-                            batch.append(row)
-                            count += 1
-
-                            # Batch insert every 500 rows
-                            if len(batch) >= 500:
-                                await self._batch_insert('stops',
-                                    ['stop_id', 'stop_code', 'stop_name', 'stop_lat', 'stop_lon',
-                                     'zone_id', 'location_type', 'parent_station', 'wheelchair_boarding',
-                                     'duplicate_group_id', 'is_duplicate'], batch)
+                        if row[stop_i] in selected_stops:
+                            batch.append(extract(row) + not_grouped)
+                            if len(batch) >= BATCH_SIZE:
+                                yield batch
                                 batch = []
 
-                    # Insert remaining
-                    if batch:
-                        await self._batch_insert('stops',
-                            ['stop_id', 'stop_code', 'stop_name', 'stop_lat', 'stop_lon',
-                             'zone_id', 'location_type', 'parent_station', 'wheelchair_boarding',
-                             'duplicate_group_id', 'is_duplicate'], batch)
+            # Insert remaining
+            if batch:
+                yield batch
 
-            _LOGGER.info("Loaded %d selected stops", count)
+        try:
+            count = await self._insert_batches('stops', columns, read_batches())
+            _LOGGER.info("Loaded %d selected stops, cached %d stop names", count, len(self._stop_names))
 
         except Exception as e:
             _LOGGER.error("Error loading stops: %s", e)
 
     async def _load_calendar_streaming(self) -> None:
         """Stream and load all calendar entries (needed for schedule filtering)."""
-        if not self._gtfs_data:
+        if not self._gtfs_path:
             return
 
-        self._gtfs_data.seek(0)
-        batch = []
+        columns = ['service_id', 'monday', 'tuesday', 'wednesday', 'thursday',
+                   'friday', 'saturday', 'sunday', 'start_date', 'end_date']
 
-        try:
-            with zipfile.ZipFile(self._gtfs_data) as zf:
+        def read_batches() -> Iterator[list]:
+            batch = []
+            with zipfile.ZipFile(self._gtfs_path) as zf:
                 with zf.open('calendar.txt') as f:
-                    reader = csv.DictReader(StringIO(f.read().decode('utf-8-sig')))
+                    reader = csv.reader(TextIOWrapper(f, encoding='utf-8-sig', newline=''))
+                    extract = _row_extractor(next(reader), columns, dict.fromkeys(columns[1:8], 0))
                     for row in reader:
-                        batch.append(row)
-                        if len(batch) >= 1000:
-                            await self._batch_insert('calendar',
-                                ['service_id', 'monday', 'tuesday', 'wednesday', 'thursday',
-                                 'friday', 'saturday', 'sunday', 'start_date', 'end_date'], batch)
-                            batch = []
-
-                    if batch:
-                        await self._batch_insert('calendar',
-                            ['service_id', 'monday', 'tuesday', 'wednesday', 'thursday',
-                             'friday', 'saturday', 'sunday', 'start_date', 'end_date'], batch)
+                        if row:
+                            batch.append(extract(row))
+                            if len(batch) >= BATCH_SIZE:
+                                yield batch
+                                batch = []
+
+            if batch:
+                yield batch
 
+        try:
+            await self._insert_batches('calendar', columns, read_batches())
             _LOGGER.info("Loaded calendar entries")
 
         except Exception as e:
@@ -274,29 +402,29 @@ class GTFSLoader:
         Many German transit agencies use calendar_dates.txt exclusively instead of calendar.txt.
         exception_type: 1 = service added, 2 = service removed
         """
-        if not self._gtfs_data:
+        if not self._gtfs_path:
             return
 
-        self._gtfs_data.seek(0)
-        batch = []
-        count = 0
+        columns = ['service_id', 'date', 'exception_type']
 
-        try:
-            with zipfile.ZipFile(self._gtfs_data) as zf:
+        def read_batches() -> Iterator[list]:
+            batch = []
+            with zipfile.ZipFile(self._gtfs_path) as zf:
                 with zf.open('calendar_dates.txt') as f:
-                    reader = csv.DictReader(StringIO(f.read().decode('utf-8-sig')))
+                    reader = csv.reader(TextIOWrapper(f, encoding='utf-8-sig', newline=''))
+                    extract = _row_extractor(next(reader), columns, {})
                     for row in reader:
-                        batch.append(row)
-                        count += 1
-                        if len(batch) >= 1000:
-                            await self._batch_insert('calendar_dates',
-                                ['service_id', 'date', 'exception_type'], batch)
-                            batch = []
+                        if row:
+                            batch.append(extract(row))
+                            if len(batch) >= BATCH_SIZE:
+                                yield batch
+                                batch = []
 
-                    if batch:
-                        await self._batch_insert('calendar_dates',
-                            ['service_id', 'date', 'exception_type'], batch)
+            if batch:
+                yield batch
 
+        try:
+            count = await self._insert_batches('calendar_dates', columns, read_batches())
             _LOGGER.info("Loaded %d calendar_dates entries", count)
 
         except KeyError:
@@ -306,42 +434,39 @@ class GTFSLoader:
 
     async def _load_routes_streaming(self) -> None:
         """Stream routes.txt and load only routes that serve our stops."""
-        if not self._gtfs_data or not self.selected_routes:
+        # Routes of an earlier load must not let trips through on a reload
+        self._loaded_route_ids = set()
+        if not self._gtfs_path or not self.selected_routes:
             return
 
-        self._gtfs_data.seek(0)
-        batch = []
-        count = 0
+        columns = ['route_id', 'agency_id', 'route_short_name', 'route_long_name',
+                   'route_desc', 'route_type', 'route_url', 'route_color',
+                   'route_text_color', 'route_sort_order']
 
-        try:
-            with zipfile.ZipFile(self._gtfs_data) as zf:
+        def read_batches() -> Iterator[list]:
+            batch = []
+            with zipfile.ZipFile(self._gtfs_path) as zf:
                 with zf.open('routes.txt') as f:
-                    reader = csv.DictReader(StringIO(f.read().decode('utf-8-sig')))
+                    reader = csv.reader(TextIOWrapper(f, encoding='utf-8-sig', newline=''))
+                    header = next(reader)
+                    route_i = header.index('route_id')
+                    extract = _row_extractor(header, columns, {'route_sort_order': 0})
+                    selected_routes = self.selected_routes
+                    loaded_route_ids = self._loaded_route_ids
                     for row in reader:
                         # Filter WHILE reading
-                        if row.get('route_id') in self.selected_routes:
-                            row.setdefault('agency_id', '')
-                            row.setdefault('route_desc', '')
-                            row.setdefault('route_url', '')
-                            row.setdefault('route_color', '')
-                            row.setdefault('route_text_color', '')
-                            row.setdefault('route_sort_order', '0')
-                            batch.append(row)
-                            count += 1
-
-                            if len(batch) >= 500:
-                                await self._batch_insert('routes',
-                                    ['route_id', 'agency_id', 'route_short_name', 'route_long_name',
-                                     'route_desc', 'route_type', 'route_url', 'route_color',
-                                     'route_text_color', 'route_sort_order'], batch)
+                        if len(row) > route_i and row[route_i] in selected_routes:
+                            batch.append(extract(row))
+                            loaded_route_ids.add(row[route_i])
+                            if len(batch) >= BATCH_SIZE:
+                                yield batch
                                 batch = []
 
-                    if batch:
-                        await self._batch_insert('routes',
-                            ['route_id', 'agency_id', 'route_short_name', 'route_long_name',
-                             'route_desc', 'route_type', 'route_url', 'route_color',
-                             'route_text_color', 'route_sort_order'], batch)
+            if batch:
+                yield batch
 
+        try:
+            count = await self._insert_batches('routes', columns, read_batches())
             _LOGGER.info("Loaded %d routes", count)
 
         except Exception as e:
@@ -352,145 +477,218 @@ class GTFSLoader:
 
         Also pre-computes final stop names for trips without headsign.
         """
-        if not self._gtfs_data or not self._discovered_trips:
+        if not self._gtfs_path or not self._discovered_trips:
             return
 
-        # First pass: find final stops for trips without headsign
-        trip_final_stops = await self._get_final_stop_names_for_trips()
+        # Final stop names for trips without headsign, found during discovery
+        trip_final_stops = {
+            trip_id: self._stop_names.get(stop_id, '')
+            for trip_id, stop_id in self._final_stop_ids.items()
+        }
 
-        self._gtfs_data.seek(0)
-        batch = []
-        count = 0
+        columns = ['trip_id', 'route_id', 'service_id', 'trip_headsign',
+                   'trip_short_name', 'direction_id', 'block_id', 'shape_id',
+                   'wheelchair_accessible', 'bikes_allowed']
+        loaded_trips = set()
 
-        try:
-            with zipfile.ZipFile(self._gtfs_data) as zf:
+        def read_batches() -> Iterator[list]:
+            batch = []
+            with zipfile.ZipFile(self._gtfs_path) as zf:
                 with zf.open('trips.txt') as f:
-                    reader = csv.DictReader(StringIO(f.read().decode('utf-8-sig')))
+                    reader = csv.reader(TextIOWrapper(f, encoding='utf-8-sig', newline=''))
+                    header = next(reader)
+                    trip_i = header.index('trip_id')
+                    route_i = header.index('route_id')
+                    width = max(trip_i, route_i) + 1
+                    extract = _row_extractor(header, columns, {
+                        'direction_id': None,
+                        'wheelchair_accessible': 0,
+                        'bikes_allowed': 0,
+                    })
+                    discovered_trips = self._discovered_trips
+                    # Trips of routes missing from routes.txt would be dropped
+                    # by every departure query joining routes anyway
+                    loaded_route_ids = self._loaded_route_ids
                     for row in reader:
                         # Filter WHILE reading
-                        if row.get('trip_id') in self._discovered_trips:
+                        if (
+                            len(row) >= width
+                            and row[trip_i] in discovered_trips
+                            and row[route_i] in loaded_route_ids
+                        ):
+                            values = extract(row)
                             # Use final stop name if no headsign
-                            if not row.get('trip_headsign'):
-                                row['trip_headsign'] = trip_final_stops.get(row.get('trip_id', ''), '')
-
-                            row.setdefault('trip_short_name', '')
-                            row.setdefault('direction_id', '')
-                            row.setdefault('block_id', '')
-                            row.setdefault('shape_id', '')
-                            row.setdefault('wheelchair_accessible', '0')
-                            row.setdefault('bikes_allowed', '0')
-                            batch.append(row)
-                            count += 1
-
-                            # Larger batch for trips (there are many)
-                            if len(batch) >= 2000:
-                                await self._batch_insert('trips',
-                                    ['trip_id', 'route_id', 'service_id', 'trip_headsign',
-                                     'trip_short_name', 'direction_id', 'block_id', 'shape_id',
-                                     'wheelchair_accessible', 'bikes_allowed'], batch)
+                            if not values[3]:
+                                values = values[:3] + (trip_final_stops.get(values[0], ''),) + values[4:]
+                            batch.append(values)
+                            loaded_trips.add(values[0])
+                            if len(batch) >= BATCH_SIZE:
+                                yield batch
                                 batch = []
 
-                    if batch:
-                        await self._batch_insert('trips',
-                            ['trip_id', 'route_id', 'service_id', 'trip_headsign',
-                             'trip_short_name', 'direction_id', 'block_id', 'shape_id',
-                             'wheelchair_accessible', 'bikes_allowed'], batch)
+            if batch:
+                yield batch
 
+        try:
+            count = await self._insert_batches('trips', columns, read_batches())
+            # stop_times only for the trips that made it in
+            self._discovered_trips = loaded_trips
             _LOGGER.info("Loaded %d trips", count)
 
         except Exception as e:
             _LOGGER.error("Error loading trips: %s", e)
 
-    async def _get_final_stop_names_for_trips(self) -> Dict[str, str]:
-        """Get final stop name for each discovered trip.
-
-        Returns: {trip_id: stop_name}
-        """
-        if not self._gtfs_data or not self._discovered_trips:
-            return {}
-
-        self._gtfs_data.seek(0)
-        trip_final_stops = {}  # trip_id -> (max_sequence, stop_id)
-
-        try:
-            with zipfile.ZipFile(self._gtfs_data) as zf:
-                # Stream stop_times to find final stop for each trip
-                with zf.open('stop_times.txt') as f:
-                    reader = csv.DictReader(StringIO(f.read().decode('utf-8-sig')))
-                    for row in reader:
-                        trip_id = row.get('trip_id')
-                        if trip_id in self._discovered_trips:
-                            seq = int(row.get('stop_sequence', 0))
-                            current = trip_final_stops.get(trip_id, (-1, ''))
-                            if seq > current[0]:
-                                trip_final_stops[trip_id] = (seq, row.get('stop_id', ''))
-
-        except Exception as e:
-            _LOGGER.warning("Error finding final stops: %s", e)
-            return {}
-
-        # Convert trip_id -> stop_name using cached stop names
-        return {
-            trip_id: self._stop_names.get(stop_id, '')
-            for trip_id, (_, stop_id) in trip_final_stops.items()
-        }
-
     async def _load_stop_times_streaming(self) -> None:
         """Stream stop_times.txt and load ONLY for selected stops.
 
         This is typically the largest file - streaming is critical.
         """
-        if not self._gtfs_data or not self.selected_stops:
+        if not self._gtfs_path or not self._discovered_trips:
             return
 
-        self._gtfs_data.seek(0)
-        batch = []
-        count = 0
+        columns = ['trip_id', 'arrival_time', 'departure_time', 'stop_id',
+                   'stop_sequence', 'stop_headsign', 'pickup_type',
+                   'drop_off_type', 'shape_dist_traveled', 'timepoint']
+        defaults = {
+            'pickup_type': 0,
+            'drop_off_type': 0,
+            'shape_dist_traveled': None,
+            'timepoint': 1,
+        }
 
-        try:
-            with zipfile.ZipFile(self._gtfs_data) as zf:
+        def read_batches_arrow() -> Iterator[list]:
+            # pyarrow parses and filters whole record batches in C++, only the
+            # stop_times of our stops and trips become Python objects
+            stop_set = pa.array(list(self.selected_stops), pa.string())
+            trip_set = pa.array(list(self._discovered_trips), pa.string())
+            # Columns missing from the file come back as nulls, made '' below
+            extract = _row_extractor(columns, columns, defaults)
+            batch = []
+            consumed = 0  # rows of the file read into record batches so far
+            resume = None
+            try:
+                with zipfile.ZipFile(self._gtfs_path) as zf:
+                    with zf.open('stop_times.txt') as f:
+                        reader = pa_csv.open_csv(
+                            f,
+                            convert_options=pa_csv.ConvertOptions(
+                                include_columns=columns,
+                                include_missing_columns=True,
+                                column_types={column: pa.string() for column in columns},
+                            ),
+                        )
+                        for record_batch in reader:
+                            num_rows = record_batch.num_rows
+                            record_batch = record_batch.filter(pc.and_(
+                                pc.is_in(record_batch.column('stop_id'), value_set=stop_set),
+                                pc.is_in(record_batch.column('trip_id'), value_set=trip_set),
+                            ))
+                            values = [
+                                pc.fill_null(record_batch.column(column), '').to_pylist()
+                                for column in columns
+                            ]
+                            batch.extend(extract(list(row)) for row in zip(*values))
+                            consumed += num_rows
+                            if len(batch) >= BATCH_SIZE:
+                                yield batch
+                                batch = []
+            except pa.ArrowInvalid as err:
+                # pyarrow rejects rows with more or fewer fields than the
+                # header, csv.reader pads or tolerates them. It reads the
+                # rest of the file, so both paths load the same rows.
+                _LOGGER.debug("Reading stop_times.txt from row %d with csv.reader: %s",
+                              consumed + 1, err)
+                resume = consumed
+
+            if batch:
+                yield batch
+            if resume is not None:
+                yield from read_batches(skip_rows=resume)
+
+        def read_batches(skip_rows: int = 0) -> Iterator[list]:
+            batch = []
+            with zipfile.ZipFile(self._gtfs_path) as zf:
                 with zf.open('stop_times.txt') as f:
-                    reader = csv.DictReader(StringIO(f.read().decode('utf-8-sig')))
+                    reader = csv.reader(TextIOWrapper(f, encoding='utf-8-sig', newline=''))
+                    header = next(reader)
+                    stop_i = header.index('stop_id')
+                    trip_i = header.index('trip_id')
+                    width = max(stop_i, trip_i) + 1
+                    # Rows go straight from the reader into insert tuples, no dicts
+                    extract = _row_extractor(header, columns, defaults)
+                    # Rows already read by pyarrow, which does not count blank lines
+                    if skip_rows:
+                        for row in reader:
+                            if row:
+                                skip_rows -= 1
+                                if not skip_rows:
+                                    break
+                    # Locals, not attribute lookups, in the loop over every stop_time
+                    selected_stops = self.selected_stops
+                    discovered_trips = self._discovered_trips
                     for row in reader:
                         # Filter WHILE reading - this is KEY for performance
-                        if row.get('stop_id') in self.selected_stops:
-                            row.setdefault('stop_headsign', '')
-                            row.setdefault('pickup_type', '0')
-                            row.setdefault('drop_off_type', '0')
-                            row.setdefault('shape_dist_traveled', '')
-                            row.setdefault('timepoint', '1')
-                            batch.append(row)
-                            count += 1
-
-                            # Large batch for stop_times (there are MANY)
-                            if len(batch) >= 3000:
-                                await self._batch_insert('stop_times',
-                                    ['trip_id', 'arrival_time', 'departure_time', 'stop_id',
-                                     'stop_sequence', 'stop_headsign', 'pickup_type',
-                                     'drop_off_type', 'shape_dist_traveled', 'timepoint'], batch)
+                        if (
+                            len(row) >= width
+                            and row[stop_i] in selected_stops
+                            and row[trip_i] in discovered_trips
+                        ):
+                            batch.append(extract(row))
+                            if len(batch) >= BATCH_SIZE:
+                                yield batch
                                 batch = []
 
-                    if batch:
-                        await self._batch_insert('stop_times',
-                            ['trip_id', 'arrival_time', 'departure_time', 'stop_id',
-                             'stop_sequence', 'stop_headsign', 'pickup_type',
-                             'drop_off_type', 'shape_dist_traveled', 'timepoint'], batch)
+            if batch:
+                yield batch
 
+        try:
+            batches = read_batches_arrow() if pa_csv is not None else read_batches()
+            count = await self._insert_batches('stop_times', columns, batches)
             _LOGGER.info("Loaded %d stop_times for selected stops", count)
 
         except Exception as e:
             _LOGGER.error("Error loading stop_times: %s", e)
 
-    async def _batch_insert(self, table: str, columns: list, rows: list) -> None:
-        """Efficient batch insert - direct to DB, no intermediate processing."""
-        if not rows:
-            return
+    async def _insert_rows(self, table: str, columns: list, rows: Iterable) -> None:
+        """Insert rows that already hold the values of columns, in order."""
         cursor = await self.database._connection.cursor()
-        placeholders = ','.join(['?' for _ in columns])
-        sql = f"INSERT OR REPLACE INTO {table} ({','.join(columns)}) VALUES ({placeholders})"
-        data = [[row.get(col, '') for col in columns] for row in rows]
-        await cursor.executemany(sql, data)
-        await self.database._connection.commit()
+        columns = tuple(columns)
+        # Multi-row INSERTs, as many rows per statement as SQLite takes
+        # parameters. Rows are flattened straight into each statement's
+        # parameters, the batch is never copied as a whole.
+        rows_per_statement = max(1, SQLITE_MAX_VARIABLES // len(columns))
+        rows = iter(rows)
+        while params := list(chain.from_iterable(islice(rows, rows_per_statement))):
+            row_count = len(params) // len(columns)
+            try:
+                # Plain INSERT, the tables hold no rows of this feed yet
+                await cursor.execute(_insert_sql("INSERT", table, columns, row_count), params)
+            except sqlite3.IntegrityError:
+                # Only this statement was undone. The feed repeats a key or the
+                # rows are already there, the last row wins as before.
+                await cursor.execute(
+                    _insert_sql("INSERT OR REPLACE", table, columns, row_count), params
+                )
+
+    async def _insert_batches(self, table: str, columns: list, batches: Iterator[list]) -> int:
+        """Insert the batches of a generator that reads them in a worker thread.
+
+        The next batch is read while the current one is written. Returns the
+        number of rows inserted.
+        """
+        count = 0
+        pending = asyncio.ensure_future(asyncio.to_thread(next, batches, None))
+        try:
+            # Shielded, so a cancelled load still lets the thread finish its
+            # batch before the generator is closed
+            while (batch := await asyncio.shield(pending)) is not None:
+                pending = asyncio.ensure_future(asyncio.to_thread(next, batches, None))
+                await self._insert_rows(table, columns, batch)
+                count += len(batch)
+        finally:
+            await asyncio.gather(pending, return_exceptions=True)
+            batches.close()
+        return count
 
     async def _download_gtfs(self) -> None:
         """Download GTFS file once."""
@@ -501,8 +699,33 @@ class GTFSLoader:
                     if response.status != 200:
                         _LOGGER.error("Failed to download GTFS: %s", response.status)
                         return
-                    data = await response.read()
-                    self._gtfs_data = BytesIO(data)
-                    _LOGGER.info("Downloaded %.1f MB", len(data) / 1024 / 1024)
+                    # Spooled to disk next to the database instead of held in
+                    # memory for the whole load, zipfile only reads the members
+                    # it is asked for
+                    part = await asyncio.to_thread(
+                        tempfile.NamedTemporaryFile,
+                        suffix='.zip',
+                        dir=os.path.dirname(self.database.db_path) or None,
+                        delete=False,
+                    )
+                    self._gtfs_path = part.name
+                    size = 0
+                    try:
+                        async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                            await asyncio.to_thread(part.write, chunk)
+                            size += len(chunk)
+                    finally:
+                        await asyncio.to_thread(part.close)
+                    _LOGGER.info("Downloaded %.1f MB", size / 1024 / 1024)
         except Exception as e:
             _LOGGER.error("Download error: %s", e)
+            await self._remove_download()
+
+    async def _remove_download(self) -> None:
+        """Delete the downloaded GTFS file, if any."""
+        if self._gtfs_path:
+            path, self._gtfs_path = self._gtfs_path, None
+            try:
+                await asyncio.to_thread(os.remove, path)
+            except OSError as e:
+                _LOGGER.warning("Could not remove %s: %s", path, e)
@@ -18,22 +18,41 @@ class GTFSRealtimeHandler:
         self.database = database
         self.realtime_url = realtime_url
         self._last_timestamp = 0
+        # Validators from the last 200 response, sent back so an unchanged
+        # feed is answered with an empty 304
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
     
-    async def async_update_realtime_data(self) -> int:
+    async def async_update_realtime_data(self) -> Optional[int]:
         """Fetch and process realtime updates efficiently.
         
-        Returns number of updates processed.
+        Returns number of updates processed, or None if the feed is unchanged
+        since the last fetch. Failed and skipped updates return 0.
         """
+        # A GTFS reload holds the writer connection for minutes. Checked before
+        # fetching, so a feed is not consumed without being stored.
+        if self.database.write_lock.locked():
+            _LOGGER.debug("GTFS data is being loaded, skipping realtime update")
+            return 0
+
         try:
             feed_message = await self._fetch_realtime_feed()
-            if not feed_message:
-                return 0
-            
-            # Process incrementally - only handle new/changed data
-            update_count = await self._process_feed_message(feed_message)
+            if feed_message is None:
+                return None
             
-            # Clean old data
-            await self._cleanup_old_updates()
+            # The inserts and the cleanup are committed together
+            async with self.database.write_lock:
+                try:
+                    # Process incrementally - only handle new/changed data
+                    update_count = await self._process_feed_message(feed_message)
+
+                    # Clean old data
+                    await self._cleanup_old_updates()
+
+                    await self.database._connection.commit()
+                except BaseException:
+                    await self.database._connection.rollback()
+                    raise
             
             return update_count
             
@@ -42,31 +61,43 @@ class GTFSRealtimeHandler:
             return 0
     
     async def _fetch_realtime_feed(self) -> Optional[FeedMessage]:
-        """Fetch realtime protobuf feed with error handling."""
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.realtime_url) as response:
-                    if response.status != 200:
-                        _LOGGER.warning("Failed to fetch realtime feed: %s", response.status)
-                        return None
-                    
-                    # Stream the response to avoid memory spikes
-                    data = await response.read()
-                    
-                    # Parse protobuf
-                    feed_message = FeedMessage()
-                    feed_message.ParseFromString(data)
-                    
-                    if feed_message.header.timestamp <= self._last_timestamp:
-                        _LOGGER.debug("Skipping old feed data")
-                        return None
-                    
-                    self._last_timestamp = feed_message.header.timestamp
-                    return feed_message
-                    
-        except Exception as err:
-            _LOGGER.error("Error fetching realtime feed: %s", err)
-            return None
+        """Fetch realtime protobuf feed.
+
+        Returns None if the feed is unchanged since the last fetch. Failed
+        fetches raise, so they are not mistaken for an unchanged feed.
+        """
+        headers = {}
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        if self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
+
+        async with aiohttp.ClientSession() as session:
+            async with session.get(self.realtime_url, headers=headers) as response:
+                if response.status == 304:
+                    _LOGGER.debug("Realtime feed not modified")
+                    return None
+
+                if response.status != 200:
+                    raise aiohttp.ClientError(
+                        f"Failed to fetch realtime feed: {response.status}"
+                    )
+                
+                # Stream the response to avoid memory spikes
+                data = await response.read()
+                
+                # Parse protobuf
+                feed_message = FeedMessage()
+                feed_message.ParseFromString(data)
+                
+                if feed_message.header.timestamp <= self._last_timestamp:
+                    _LOGGER.debug("Skipping old feed data")
+                    return None
+                
+                self._last_timestamp = feed_message.header.timestamp
+                self._etag = response.headers.get("ETag")
+                self._last_modified = response.headers.get("Last-Modified")
+                return feed_message
     
     async def _process_feed_message(self, feed_message: FeedMessage) -> int:
         """Process feed message efficiently with batched inserts."""
@@ -142,7 +173,6 @@ class GTFSRealtimeHandler:
         if batch:
             await self._insert_realtime_batch(cursor, batch)
         
-        await self.database._connection.commit()
         _LOGGER.info("Processed %d realtime updates", update_count)
         return update_count
     
@@ -170,7 +200,6 @@ class GTFSRealtimeHandler:
         """, (cutoff_timestamp,))
         
         deleted = cursor.rowcount
-        await self.database._connection.commit()
         
         if deleted > 0:
             _LOGGER.debug("Cleaned up %d old realtime updates", deleted)
\ No newline at end of file
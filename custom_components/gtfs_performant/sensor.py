@@ -14,6 +14,9 @@ from . import DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
+_MARKDOWN_HEADER = "| Route | Destination | Time | Delay |\n|:---:|:---|:---:|:---:|"
+_MARKDOWN_ROW = "| **{route}** | {destination} | {time} | {delay} |"
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -56,12 +59,11 @@ async def async_setup_entry(
         ))
     else:
         # Create sensors for stop groups (multiple stops combined)
-        grouped_stop_ids = set()
+        grouped_stop_ids = {s for group in stop_groups for s in group.get("stops", [])}
         for group in stop_groups:
             group_name = group.get("name", "Unknown Group")
             group_stops = group.get("stops", [])
             if group_stops:
-                grouped_stop_ids.update(group_stops)
                 _LOGGER.info("Creating grouped sensor: %s with stops %s", group_name, group_stops)
                 entities.append(GTFSDepartureSensor(
                     coordinator, database, entry, group_stops[0], group_name, group_stops, agency_timezone
@@ -205,11 +207,16 @@ class GTFSDepartureSensor(CoordinatorEntity, SensorEntity):
 
         # Build markdown table for easy display
         if formatted_departures:
-            md_lines = ["| Route | Destination | Time | Delay |", "|:---:|:---|:---:|:---:|"]
-            for dep in formatted_departures:
-                delay_str = f"+{dep['delay_minutes']}m" if dep['delay_minutes'] > 0 else "on time"
-                minutes = f"in {dep['minutes_until']}m" if dep['minutes_until'] is not None else dep['expected']
-                md_lines.append(f"| **{dep['route']}** | {dep['destination']} | {minutes} | {delay_str} |")
+            md_lines = [_MARKDOWN_HEADER]
+            md_lines.extend(
+                _MARKDOWN_ROW.format(
+                    route=dep['route'],
+                    destination=dep['destination'],
+                    time=f"in {dep['minutes_until']}m" if dep['minutes_until'] is not None else dep['expected'],
+                    delay=f"+{dep['delay_minutes']}m" if dep['delay_minutes'] > 0 else "on time",
+                )
+                for dep in formatted_departures
+            )
             attributes["departures_markdown"] = "\n".join(md_lines)
         else:
             attributes["departures_markdown"] = "*No upcoming departures*"
@@ -0,0 +1 @@
+"""Tests for the GTFS Performant integration."""
@@ -0,0 +1,70 @@
+"""Tests for the GTFS loader."""
+import asyncio
+import zipfile
+
+import pytest
+
+from custom_components.gtfs_performant import gtfs_loader
+from custom_components.gtfs_performant.gtfs_loader import GTFSLoader
+
+pytest.importorskip("pyarrow")
+
+HEADER = "trip_id,arrival_time,departure_time,stop_id,stop_sequence,pickup_type,timepoint"
+RAGGED_ROWS = [
+    # Trailing optional fields omitted
+    "T1,09:00:00,09:00:00,S1,900",
+    "",
+    # One extra trailing field
+    "T2,09:10:00,09:10:00,S1,901,1,1,extra",
+    # Quoted field spanning two lines
+    'T3,"09:20\n:00",09:20:00,S3,902,,',
+]
+
+
+@pytest.fixture
+def ragged_gtfs(tmp_path):
+    """A feed whose stop_times.txt turns ragged after several record batches."""
+    lines = [HEADER]
+    lines += [f"T{i % 5},08:00:00,08:00:00,S{i % 4},{i},,0" for i in range(60000)]
+    lines += RAGGED_ROWS
+    lines += [f"T{i % 5},10:00:00,10:00:00,S{i % 4},{i},1," for i in range(60000, 60100)]
+    path = tmp_path / "gtfs.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("stop_times.txt", "\n".join(lines) + "\n")
+    return path
+
+
+def _load_stop_times(gtfs_path) -> list[tuple]:
+    """Run the stop_times loader and collect the rows it would insert."""
+    loader = GTFSLoader(None, "http://localhost/gtfs.zip", ["S1", "S3"])
+    loader._gtfs_path = str(gtfs_path)
+    loader._discovered_trips = {"T1", "T2", "T3"}
+    rows = []
+
+    async def collect(table, columns, batches):
+        for batch in batches:
+            rows.extend(batch)
+        return len(rows)
+
+    loader._insert_batches = collect
+    asyncio.run(loader._load_stop_times_streaming())
+    return rows
+
+
+def test_ragged_stop_times_same_with_and_without_pyarrow(ragged_gtfs, monkeypatch):
+    """pyarrow and csv.reader load the same rows from a ragged stop_times.txt."""
+    monkeypatch.setattr(gtfs_loader, "BATCH_SIZE", 1000)
+    arrow_rows = _load_stop_times(ragged_gtfs)
+
+    monkeypatch.setattr(gtfs_loader, "pa_csv", None)
+    csv_rows = _load_stop_times(ragged_gtfs)
+
+    assert arrow_rows == csv_rows
+    ragged = {row[4]: row for row in csv_rows if row[4] in ("900", "901", "902")}
+    assert ragged == {
+        "900": ("T1", "09:00:00", "09:00:00", "S1", "900", "", 0, 0, None, 1),
+        "901": ("T2", "09:10:00", "09:10:00", "S1", "901", "", "1", 0, None, "1"),
+        "902": ("T3", "09:20\n:00", "09:20:00", "S3", "902", "", 0, 0, None, 1),
+    }
+    # Rows after the ragged ones are loaded as well
+    assert ("T1", "10:00:00", "10:00:00", "S1", "60001", "", "1", 0, None, 1) in csv_rows